@@ -1,24 +1,38 @@
 import streamlit as st
-import numpy as np
 from PIL import Image
+from io import BytesIO
 import random
-import pycountry
+import json
+import uuid
+import hashlib
 
 from services.skin_service import detect_skin_tone
 from services.gemini_service import get_style_recommendation
 from services.image_service import (
     generate_outfit_images,
     generate_pinterest_inspo,
+    start_model_warmup,
     virtual_tryon,
 )
-from services.location_service import get_states
+from services.location_service import get_countries, get_states
 from services.chat_service import chat_response
+from services.conversation_service import ChatMemory, style_audience, style_profile
+from services.prefetch_service import StylePrefetcher, style_inputs
+from services.metrics_service import RERUNS, start_metrics_server
+from services.session_store import SESSION_STORE
+from services.catalog_service import get_catalog
 
 # ══════════════════════════════════════════════════════
 # Page Config
 # ══════════════════════════════════════════════════════
 st.set_page_config(page_title="StyleAI", layout="wide")
 
+# Prometheus scrape endpoint on METRICS_PORT (no-op when unset, started once)
+start_metrics_server()
+
+# Background pings keep the HF models loaded (started once per process)
+start_model_warmup()
+
 # ══════════════════════════════════════════════════════
 # Styles
 # ══════════════════════════════════════════════════════
@@ -72,6 +86,39 @@ def get_state(key, default):
         st.session_state[key] = default
     return st.session_state[key]
 
+def session_id():
+    return get_state("session_id", uuid.uuid4().hex)
+
+def fingerprint(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def stored_images(kind, key, generate):
+    """
+    Run `generate` once per `key`, keeping its images WebP-encoded in the
+    session store; later reruns render straight from the stored bytes.
+    Results with a failed image are not kept, so the next rerun retries.
+    """
+    meta = st.session_state.get(f"{kind}_images")
+    if meta and meta["key"] == key:
+        items = [dict(m, image=SESSION_STORE.get(session_id(), m["name"])) for m in meta["items"]]
+        if all(item["image"] is not None for item in items):
+            return items
+
+    results = generate()
+    items = []
+    for i, item in enumerate(results):
+        meta_item = {k: v for k, v in item.items() if k not in ("image", "base64")}
+        meta_item["name"] = f"{kind}:{i}"
+        if item["image"] is not None:
+            SESSION_STORE.put_image(session_id(), meta_item["name"], item["image"])
+        else:
+            SESSION_STORE.delete(session_id(), meta_item["name"])
+        items.append(meta_item)
+
+    if all(item["image"] is not None for item in results):
+        st.session_state[f"{kind}_images"] = {"key": key, "items": items}
+    return [dict(m, image=r["image"]) for m, r in zip(items, results)]
+
 # ══════════════════════════════════════════════════════
 # Header
 # ══════════════════════════════════════════════════════
@@ -90,8 +137,8 @@ st.info(random.choice(quotes))
 if "step" not in st.session_state:
     st.session_state.step = 1
 
+RERUNS.inc(step=st.session_state.step)
 st.progress(st.session_state.step / 3)
-countries = [c.name for c in pycountry.countries]
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -110,12 +157,21 @@ if st.session_state.step == 1:
     if uploaded:
         image = Image.open(uploaded).convert("RGB")
         st.image(image, width=250, caption="Your photo")
-        st.session_state.user_photo_bytes = uploaded.getvalue()
-        st.session_state.skin_tone = detect_skin_tone(np.array(image))
+        # Kept once, downscaled + WebP-encoded, in the session store — not in session_state
+        photo_key = fingerprint(getattr(uploaded, "file_id", uploaded.name), uploaded.size)
+        # Also re-store if the session idled out of the store while the upload stayed
+        if (st.session_state.get("user_photo_key") != photo_key
+                or SESSION_STORE.get(session_id(), "user_photo") is None):
+            stored = image.copy()
+            stored.thumbnail((1024, 1024))
+            SESSION_STORE.put_image(session_id(), "user_photo", stored)
+            st.session_state.user_photo_key = photo_key
+        st.session_state.skin_tone = detect_skin_tone(image)
         st.success(f"Skin tone detected: **{st.session_state.skin_tone}**")
     else:
         st.caption("No photo? No problem — fill in the details below.")
-        st.session_state.user_photo_bytes = None
+        SESSION_STORE.delete(session_id(), "user_photo")
+        st.session_state.user_photo_key = None
 
         st.markdown("""
         <div style="background:rgba(99,102,241,0.15);border-radius:8px;padding:8px 12px;
@@ -208,6 +264,7 @@ elif st.session_state.step == 2:
         default=get_state("colors", []),
     )
 
+    countries = get_countries()
     default_country = get_state("country", "India")
     st.session_state.country = st.selectbox(
         "Country",
@@ -228,6 +285,9 @@ elif st.session_state.step == 2:
             "State / Region", value=get_state("state", "")
         )
 
+    # Start the recommendation in the background once inputs settle
+    get_state("prefetcher", StylePrefetcher()).observe(style_inputs(st.session_state))
+
     col1, col2 = st.columns(2)
     with col1:
         if st.button("← Back"):
@@ -252,7 +312,14 @@ elif st.session_state.step == 3:
 
     with st.spinner("Crafting your style recommendation…"):
         try:
-            result = get_style_recommendation(st.session_state)
+            prefetcher = get_state("prefetcher", StylePrefetcher())
+            inputs = style_inputs(st.session_state)
+            result = prefetcher.take(inputs)
+            if result is None:
+                result = get_style_recommendation(inputs)
+                prefetcher.put(inputs, result)
+            # The chat assistant grounds its answers in the current report
+            st.session_state.style_result = result
         except Exception as e:
             st.error(f"StyleAI is busy right now. Please go back and try again. ({e})")
             if st.button("← Back"):
@@ -284,7 +351,11 @@ elif st.session_state.step == 3:
     style_ctx = f"{st.session_state.get('style','')} {st.session_state.get('occasion','')}"
 
     with st.spinner("Generating outfit images… (this takes ~30–60s on first load)"):
-        outfit_results = generate_outfit_images(outfit_prompts, style_context=style_ctx)
+        outfit_results = stored_images(
+            "outfit",
+            fingerprint(outfit_prompts, style_ctx),
+            lambda: generate_outfit_images(outfit_prompts, style_context=style_ctx, include_base64=False),
+        )
 
     if outfit_results:
         cols = st.columns(len(outfit_results))
@@ -314,10 +385,17 @@ elif st.session_state.step == 3:
     inspo_keywords = [k for k in [trend_keyword, style_keyword, color_keyword] if k.strip()][:2]
 
     with st.spinner("Building your inspo board…"):
-        inspo_results = generate_pinterest_inspo(
-            inspo_keywords,
-            n_real=2,
-            n_generated=2,
+        inspo_results = stored_images(
+            "inspo",
+            fingerprint(inspo_keywords),
+            lambda: generate_pinterest_inspo(
+                inspo_keywords,
+                n_real=2,
+                n_generated=2,
+                include_base64=False,
+                # Four columns on the wide layout ≈ 300px per photo
+                display_width=300,
+            ),
         )
 
     if inspo_results:
@@ -350,12 +428,11 @@ elif st.session_state.step == 3:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("🪄 Virtual Try-On")
 
-    user_photo_bytes = st.session_state.get("user_photo_bytes")
+    user_photo_bytes = None
+    if st.session_state.get("user_photo_key"):
+        user_photo_bytes = SESSION_STORE.get(session_id(), "user_photo")
 
     if user_photo_bytes:
-        from io import BytesIO
-        user_photo = Image.open(BytesIO(user_photo_bytes)).convert("RGB")
-
         st.markdown('<span class="badge-tryon">✅ Using your uploaded photo</span>', unsafe_allow_html=True)
         st.write("")
 
@@ -363,23 +440,32 @@ elif st.session_state.step == 3:
         hair_makeup = f"{result.get('hairstyle', '')}. {result.get('makeup', '')}"
         accessories = ""
 
-        with st.spinner("Creating your virtual try-on… (30–90s)"):
+        def run_tryon():
             tryon = virtual_tryon(
-                user_photo=user_photo,
+                user_photo=Image.open(BytesIO(user_photo_bytes)).convert("RGB"),
                 outfit_description=outfit_desc,
                 hair_makeup_description=hair_makeup,
                 accessories=accessories,
                 use_ai_compositing=True,
+                include_base64=False,
             )
+            return [{"image": tryon["tryon_image"], "method": tryon.get("method", "")}]
+
+        with st.spinner("Creating your virtual try-on… (30–90s)"):
+            tryon = stored_images(
+                "tryon",
+                fingerprint(st.session_state.user_photo_key, outfit_desc, hair_makeup, accessories),
+                run_tryon,
+            )[0]
 
-        if tryon["success"]:
+        if tryon["image"] is not None:
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown("**📸 Your Photo**")
-                st.image(user_photo, use_container_width=True)
+                st.image(user_photo_bytes, use_container_width=True)
             with col2:
                 st.markdown("**✨ Virtual Try-On**")
-                st.image(tryon["tryon_image"], use_container_width=True)
+                st.image(tryon["image"], use_container_width=True)
 
             method = tryon.get("method", "")
             if method == "ai_img2img":
@@ -412,6 +498,24 @@ elif st.session_state.step == 3:
     # ── Shop Links ────────────────────────────────────────────────────────
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("🛍️ Shop Similar Styles")
+    catalog = get_catalog()
+    if catalog is not None:
+        matches = catalog.search(
+            result["outfit"],
+            budget_min=st.session_state.get("budget_min", 0),
+            budget_max=st.session_state.get("budget_max", 20000),
+            colors=st.session_state.get("colors", []),
+        )
+        if matches:
+            st.caption("Matches within your budget")
+            cols = st.columns(3)
+            for i, item in enumerate(matches):
+                with cols[i % 3]:
+                    if item["image"]:
+                        st.image(item["image"], use_container_width=True)
+                    label = f"{item['title']} — {item['price']:,.0f}"
+                    st.markdown(f"[{label}]({item['url']})" if item["url"] else label)
+            st.write("")
     query = result["outfit"].replace(" ", "+")[:80]
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -435,8 +539,8 @@ elif st.session_state.step == 3:
 # ════════════════════════════════════════════════════════════════════════════
 if "chat_open" not in st.session_state:
     st.session_state.chat_open = False
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = ChatMemory()
 
 if st.button("💬 StyleAI Chat", key="chat_toggle"):
     st.session_state.chat_open = not st.session_state.chat_open
@@ -445,7 +549,7 @@ if st.session_state.chat_open:
     st.sidebar.header("💬 StyleAI Assistant")
 
     # Chat history display
-    for chat in st.session_state.chat_history[-6:]:
+    for chat in st.session_state.chat_memory.turns[-6:]:
         role_icon = "🧑" if chat["role"] == "user" else "✨"
         bg = "rgba(255,255,255,0.05)" if chat["role"] == "user" else "rgba(99,102,241,0.15)"
         st.sidebar.markdown(f"""
@@ -466,12 +570,17 @@ if st.session_state.chat_open:
         send = st.button("Send ➤", key="chat_send", use_container_width=True)
     with col2:
         if st.button("Clear", key="chat_clear", use_container_width=True):
-            st.session_state.chat_history = []
+            st.session_state.chat_memory.clear()
             st.rerun()
 
     if send and msg.strip():
-        st.session_state.chat_history.append({"role": "user", "text": msg})
+        inputs = style_inputs(st.session_state)
+        profile = style_profile(inputs, st.session_state.get("style_result"))
         with st.spinner("Thinking…"):
-            reply = chat_response(msg)
-        st.session_state.chat_history.append({"role": "assistant", "text": reply})
+            chat_response(
+                msg,
+                memory=st.session_state.chat_memory,
+                profile=profile,
+                audience=style_audience(inputs),
+            )
         st.rerun()
\ No newline at end of file
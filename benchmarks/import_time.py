@@ -0,0 +1,119 @@
+"""
+Cold-start import benchmark.
+
+Runs each target in a fresh interpreter with `python -X importtime` and reports
+the cumulative import cost, plus the heaviest third-party packages it pulled in.
+The "app" target replays exactly the top-level imports of app.py, which is what
+a Streamlit replica pays before first paint.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --max-ms 1500   # fail CI on regressions
+"""
+import os
+import re
+import ast
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVICE_MODULES = [
+    "services.clients",
+    "services.metrics_service",
+    "services.profiling_service",
+    "services.skin_service",
+    "services.location_service",
+    "services.gemini_service",
+    "services.chat_service",
+    "services.image_service",
+]
+
+# Packages that must NOT load just because app.py was imported
+DEFERRED = ["cv2", "numpy", "pycountry", "google.genai", "requests", "httpx"]
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def app_import_source() -> str:
+    """Top-level import statements of app.py, in order."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(n) for n in nodes)
+
+
+def measure(source: str) -> tuple[float, dict[str, float], set[str]]:
+    """Run `source` under -X importtime; return (total ms, top-level ms per package, loaded modules)."""
+    probe = source + "\nimport sys as _s; _s.stderr.write('LOADED ' + ' '.join(_s.modules) + '\\n')"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+
+    total_us = 0
+    per_package: dict[str, float] = {}
+    loaded: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("LOADED "):
+            loaded = set(line[7:].split())
+            continue
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if indent == 1:   # top-level import of the probe
+            total_us += cumulative
+            root = name.split(".")[0]
+            per_package[root] = per_package.get(root, 0) + cumulative / 1000
+    return total_us / 1000, per_package, loaded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure StyleAI cold-start import time.")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to list for app")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="exit non-zero if the app target's median exceeds this")
+    args = parser.parse_args(argv)
+
+    targets = [(m, f"import {m}") for m in SERVICE_MODULES]
+    targets.append(("app", app_import_source()))
+
+    failed = False
+    app_packages: dict[str, float] = {}
+    app_loaded: set[str] = set()
+    print(f"{'target':<32}{'median ms':>12}{'min ms':>10}")
+    for name, source in targets:
+        try:
+            runs = [measure(source) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<32}{'error':>12}  {e}")
+            failed = True
+            continue
+        times = [r[0] for r in runs]
+        print(f"{name:<32}{statistics.median(times):>12.1f}{min(times):>10.1f}")
+        if name == "app":
+            app_packages, app_loaded = runs[-1][1], runs[-1][2]
+            if args.max_ms is not None and statistics.median(times) > args.max_ms:
+                print(f"\napp import median exceeds --max-ms {args.max_ms:.0f}")
+                failed = True
+
+    if app_packages:
+        print("\nheaviest packages imported by app.py:")
+        for pkg, ms in sorted(app_packages.items(), key=lambda kv: -kv[1])[: args.top]:
+            print(f"  {pkg:<28}{ms:>10.1f} ms")
+
+        eager = [m for m in DEFERRED if m in app_loaded]
+        if eager:
+            print(f"\nloaded eagerly but should be deferred: {', '.join(eager)}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+Run app.py with each rerun cProfiled:
+
+    STYLEAI_PROFILE=rerun streamlit run profile_app.py
+
+Kept out of app.py so the app stays a plain top-level script.
+"""
+import os
+import runpy
+
+import streamlit as st
+
+from services.profiling_service import profile_rerun
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+with profile_rerun(f"step{st.session_state.get('step', 1)}"):
+    runpy.run_path(APP, run_name="__main__")
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+from services.metrics_service import counter
+
+log = logging.getLogger(__name__)
+
+# Expired rows are deleted by put() at most this often, so the file doesn't grow forever
+PURGE_INTERVAL = 3600
+
+CACHE_LOOKUPS = counter(
+    "styleai_cache_lookups_total",
+    "Shared cache lookups by cache name and result.",
+    ("cache", "result"),
+)
+
+
+class BytesLRU:
+    """Thread-safe LRU of byte strings bounded by total size, shared process-wide."""
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+        CACHE_LOOKUPS.inc(cache=self.name, result="hit" if data is not None else "miss")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class PersistentTTLCache:
+    """
+    JSON values with a TTL in a local SQLite file, so cached results survive
+    restarts and are shared by every process on the host that uses the same path.
+    """
+
+    def __init__(self, name: str, path: str, ttl: float):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._next_purge = time.time() + PURGE_INTERVAL
+
+    def _connect(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+        return self._conn
+
+    def get(self, key: str):
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"[Cache:{self.name}] read failed: {e}")
+            row = None
+        if row is None or row[1] <= now:
+            CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+            return None
+        CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        return json.loads(row[0])
+
+    def put(self, key: str, value, ttl: float | None = None) -> None:
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), expires),
+                    )
+                    if now >= self._next_purge:
+                        self._next_purge = now + PURGE_INTERVAL
+                        conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        except sqlite3.Error as e:
+            log.warning(f"[Cache:{self.name}] write failed: {e}")
+
+    def purge_expired(self) -> int:
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    self._next_purge = time.time() + PURGE_INTERVAL
+                    return conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            log.warning(f"[Cache:{self.name}] purge failed: {e}")
+            return 0
@@ -0,0 +1,568 @@
+"""
+Offline product catalog for budget-aware "Shop Similar Styles" matching.
+
+A catalog directory holds immutable segments, one per ingested feed (CSV or
+JSONL). Each segment stores an inverted keyword index plus columnar price /
+color arrays as .npy files that are memory-mapped at query time, so millions
+of SKUs cost page cache rather than heap. Later feeds tombstone older rows
+with the same SKU; `compact` folds all segments back into one.
+
+    python -m services.catalog_service ingest feed.csv --dir catalog
+    python -m services.catalog_service search "black linen kurta" --max 3000
+    python -m services.catalog_service compact --dir catalog
+"""
+import os
+import sys
+import csv
+import json
+import math
+import time
+import array
+import shutil
+import hashlib
+import logging
+import threading
+
+from services.clients import load_env
+
+log = logging.getLogger(__name__)
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+CATALOG_DIR = os.getenv("CATALOG_DIR", "catalog")
+MANIFEST    = "manifest.json"
+COLOR_BOOST = 1.5   # score bonus for matching one of the user's colors
+
+# Bit per color; items and queries are compared as bitmasks
+COLOR_VOCAB = (
+    "black", "white", "grey", "red", "maroon", "pink", "orange", "yellow",
+    "gold", "green", "olive", "mint", "teal", "blue", "navy", "purple",
+    "lavender", "brown", "beige", "cream", "tan", "khaki", "rust", "peach",
+    "silver", "multi",
+)
+COLOR_BITS = {c: 1 << i for i, c in enumerate(COLOR_VOCAB)}
+COLOR_ALIASES = {
+    "gray": "grey", "offwhite": "cream", "ivory": "cream", "burgundy": "maroon",
+    "wine": "maroon", "mustard": "yellow", "violet": "purple", "lilac": "lavender",
+    "camel": "tan", "coffee": "brown", "charcoal": "grey", "golden": "gold",
+    "multicolor": "multi", "multicolour": "multi",
+}
+# The app's color picker uses a few group names
+COLOR_GROUPS = {
+    "pastel": ("pink", "lavender", "mint", "peach", "cream"),
+    "earth tones": ("brown", "beige", "olive", "tan", "khaki", "rust"),
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the this to with your you "
+    "look style outfit wear paired pair perfect add adds complete".split()
+)
+
+
+# Indexed text; records keep these so compact() can rebuild the same terms
+TEXT_FIELDS = ("title", "name", "category", "brand", "description")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# TEXT + COLOR HELPERS
+# ═════════════════════════════════════════════════════════════════════════════
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    word = []
+    for ch in (text or "").lower():
+        if ch.isalnum():
+            word.append(ch)
+        elif word:
+            tokens.append("".join(word))
+            word = []
+    if word:
+        tokens.append("".join(word))
+    out = []
+    for tok in tokens:
+        if len(tok) < 2 or tok in STOPWORDS or tok.isdigit():
+            continue
+        # Cheap plural folding: "kurtas" → "kurta", "heels" → "heel"
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        out.append(tok)
+    return out
+
+
+def color_mask(names) -> int:
+    """Bitmask for color words or app color groups ("Pastel", "Earth tones")."""
+    if isinstance(names, str):
+        names = names.replace("|", ",").replace("/", ",").split(",")
+    mask = 0
+    for name in names or []:
+        key = name.strip().lower()
+        if key in COLOR_GROUPS:
+            for member in COLOR_GROUPS[key]:
+                mask |= COLOR_BITS[member]
+            continue
+        key = COLOR_ALIASES.get(key.replace("-", "").replace(" ", ""), key)
+        mask |= COLOR_BITS.get(key, 0)
+    return mask
+
+
+def _sku_hash(sku: str) -> int:
+    return int.from_bytes(hashlib.blake2b(sku.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _parse_price(value) -> float | None:
+    try:
+        return float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_deleted(row: dict) -> bool:
+    flag = str(row.get("deleted", row.get("status", ""))).strip().lower()
+    return flag in ("1", "true", "yes", "deleted", "removed", "discontinued")
+
+
+def _read_feed(path: str):
+    """Yield dict rows from a CSV or JSONL product feed, skipping lines that do not parse."""
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        with open(path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    log.warning(f"[Catalog] Skipping {path}:{lineno}: {e}")
+                    continue
+                if not isinstance(row, dict):
+                    log.warning(f"[Catalog] Skipping {path}:{lineno}: not a JSON object")
+                    continue
+                yield row
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# STORAGE
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _read_manifest(catalog_dir: str) -> dict:
+    path = os.path.join(catalog_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"segments": [], "version": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(catalog_dir: str, manifest: dict) -> None:
+    tmp = os.path.join(catalog_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(catalog_dir, MANIFEST))   # readers never see a half-written manifest
+
+
+class _Segment:
+    """One immutable, memory-mapped segment (deleted.npy is the only mutable file)."""
+
+    def __init__(self, path: str):
+        import numpy as np
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as f:
+            self.terms: dict[str, list[int]] = json.load(f)
+
+        def load(name, mode="r"):
+            return np.load(os.path.join(path, name), mmap_mode=mode)
+
+        self.price = load("price.npy")
+        self.price_sorted = load("price_sorted.npy")
+        self.price_order = load("price_order.npy")
+        self.colors = load("colors.npy")
+        self.sku_hash = load("sku_hash.npy")
+        self.sku_rows = load("sku_rows.npy")
+        self.postings = load("postings.npy")
+        self.offsets = load("record_offsets.npy")
+        self.deleted = load("deleted.npy")
+        self._records = open(os.path.join(path, "records.jsonl"), "rb")
+        self._records_lock = threading.Lock()
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    def record(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        with self._records_lock:
+            self._records.seek(start)
+            return json.loads(self._records.read(end - start))
+
+    def lookup_rows(self, hashes):
+        """Every row whose SKU hash is in `hashes` (sorted) — a SKU repeated in one feed has several."""
+        import numpy as np
+        left = np.searchsorted(self.sku_hash, hashes, side="left")
+        right = np.searchsorted(self.sku_hash, hashes, side="right")
+        counts = right - left
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # Expand each [left, right) span into its positions
+        starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+        return np.asarray(self.sku_rows[starts + np.arange(total)], dtype=np.int64)
+
+    def close(self) -> None:
+        self._records.close()
+
+
+def _write_segment(seg_dir: str, rows, source: str) -> tuple[int, list[int]]:
+    """
+    Build one segment from an iterable of product dicts.
+    Returns (rows written, hashes of every SKU seen — including deletions).
+    """
+    import numpy as np
+    os.makedirs(seg_dir)
+
+    prices = array.array("f")
+    colors = array.array("I")
+    hashes = array.array("Q")
+    post_terms = array.array("i")
+    post_rows = array.array("i")
+    vocab: dict[str, int] = {}
+    offsets = array.array("q", [0])
+    seen_rows: dict[int, int] = {}
+    deleted_in_feed = []
+    all_hashes: set[int] = set()
+
+    with open(os.path.join(seg_dir, "records.jsonl"), "wb") as records:
+        for raw in rows:
+            sku = str(raw.get("sku") or raw.get("id") or "").strip()
+            if not sku:
+                continue
+            h = _sku_hash(sku)
+            all_hashes.add(h)
+            if _is_deleted(raw):
+                if h in seen_rows:
+                    deleted_in_feed.append(seen_rows.pop(h))
+                continue
+            price = _parse_price(raw.get("price"))
+            if price is None:
+                continue
+
+            row = len(prices)
+            if h in seen_rows:   # duplicate SKU in one feed — last one wins
+                deleted_in_feed.append(seen_rows[h])
+            seen_rows[h] = row
+
+            title = str(raw.get("title") or raw.get("name") or "")
+            color_field = raw.get("colors") or raw.get("color") or ""
+            if isinstance(color_field, list):
+                color_field = ",".join(color_field)
+            text = " ".join(str(raw.get(k) or "") for k in TEXT_FIELDS)
+            mask = color_mask(color_field) | color_mask(tokenize(text))
+
+            prices.append(price)
+            colors.append(mask)
+            hashes.append(h)
+            for term in set(tokenize(text)):
+                post_terms.append(vocab.setdefault(term, len(vocab)))
+                post_rows.append(row)
+
+            record = {
+                "sku": sku, "title": title, "price": price,
+                "url": raw.get("url") or raw.get("link") or "",
+                "brand": raw.get("brand") or "", "image": raw.get("image") or raw.get("image_url") or "",
+                "colors": [c for c in COLOR_VOCAB if mask & COLOR_BITS[c]],
+            }
+            for k in ("name", "category", "description"):
+                if raw.get(k):
+                    record[k] = str(raw[k])
+            records.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            offsets.append(records.tell())
+
+    n = len(prices)
+    price = np.frombuffer(prices, dtype=np.float32) if n else np.empty(0, np.float32)
+    order = np.argsort(price, kind="stable").astype(np.int32)
+    np.save(os.path.join(seg_dir, "price.npy"), price)
+    np.save(os.path.join(seg_dir, "price_order.npy"), order)
+    np.save(os.path.join(seg_dir, "price_sorted.npy"), price[order])
+    np.save(os.path.join(seg_dir, "colors.npy"), np.frombuffer(colors, dtype=np.uint32) if n else np.empty(0, np.uint32))
+    np.save(os.path.join(seg_dir, "record_offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+    sku_hash = np.frombuffer(hashes, dtype=np.uint64) if n else np.empty(0, np.uint64)
+    sku_order = np.argsort(sku_hash, kind="stable")
+    np.save(os.path.join(seg_dir, "sku_hash.npy"), sku_hash[sku_order])
+    np.save(os.path.join(seg_dir, "sku_rows.npy"), sku_order.astype(np.int32))
+
+    deleted = np.zeros(n, dtype=bool)
+    deleted[deleted_in_feed] = True
+    np.save(os.path.join(seg_dir, "deleted.npy"), deleted)
+
+    # Group (term, row) pairs by term → one contiguous posting list per term
+    term_ids = np.frombuffer(post_terms, dtype=np.int32) if len(post_terms) else np.empty(0, np.int32)
+    post = np.frombuffer(post_rows, dtype=np.int32) if len(post_rows) else np.empty(0, np.int32)
+    by_term = np.argsort(term_ids, kind="stable")
+    np.save(os.path.join(seg_dir, "postings.npy"), post[by_term])
+    counts = np.bincount(term_ids, minlength=len(vocab))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(vocab) else []
+    terms = {t: [int(starts[i]), int(counts[i])] for t, i in vocab.items()}
+    with open(os.path.join(seg_dir, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    with open(os.path.join(seg_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": n, "source": source, "created": time.time()}, f)
+
+    return n, list(all_hashes)
+
+
+def _build_segment(catalog_dir: str, name: str, rows, source: str) -> tuple[str, int, list[int]]:
+    """Write a segment under a temporary directory. Returns (temp path, rows, SKU hashes)."""
+    tmp = os.path.join(catalog_dir, f".{name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)   # left over from a build that died
+    try:
+        n, hashes = _write_segment(tmp, rows, source)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return tmp, n, hashes
+
+
+def _install_segment(catalog_dir: str, tmp: str, name: str) -> None:
+    final = os.path.join(catalog_dir, name)
+    # Not in the manifest yet, so anything already there is debris from a failed run
+    shutil.rmtree(final, ignore_errors=True)
+    os.rename(tmp, final)
+
+
+def ingest(feed_path: str, catalog_dir: str = CATALOG_DIR) -> int:
+    """Add a feed as a new segment; SKUs it contains replace those in older segments."""
+    import numpy as np
+    os.makedirs(catalog_dir, exist_ok=True)
+    manifest = _read_manifest(catalog_dir)
+    version = manifest["version"] + 1
+    name = f"seg-{version:06d}"
+
+    tmp, n, hashes = _build_segment(catalog_dir, name, _read_feed(feed_path), feed_path)
+
+    # Tombstone superseded rows in older segments before the new one becomes visible
+    if hashes:
+        wanted = np.sort(np.array(hashes, dtype=np.uint64))
+        for old in manifest["segments"]:
+            seg = _Segment(os.path.join(catalog_dir, old))
+            rows = seg.lookup_rows(wanted)
+            seg.close()
+            if len(rows):
+                deleted = np.load(os.path.join(catalog_dir, old, "deleted.npy"), mmap_mode="r+")
+                deleted[rows] = True
+                deleted.flush()
+                del deleted
+
+    _install_segment(catalog_dir, tmp, name)
+    manifest["segments"].append(name)
+    manifest["version"] = version
+    _write_manifest(catalog_dir, manifest)
+    log.info(f"[Catalog] Ingested {n} products from {feed_path} into {name}")
+    return n
+
+
+def compact(catalog_dir: str = CATALOG_DIR) -> int:
+    """Rewrite all live rows into a single segment and drop the old ones."""
+    manifest = _read_manifest(catalog_dir)
+    if not manifest["segments"]:
+        return 0
+    segments = [_Segment(os.path.join(catalog_dir, s)) for s in manifest["segments"]]
+
+    def live_rows():
+        for seg in segments:
+            for row in range(seg.rows):
+                if not seg.deleted[row]:
+                    yield seg.record(row)
+
+    version = manifest["version"] + 1
+    name = f"seg-{version:06d}"
+    try:
+        tmp, n, _ = _build_segment(catalog_dir, name, live_rows(), "compact")
+    finally:
+        for seg in segments:
+            seg.close()
+    old = manifest["segments"]
+    _install_segment(catalog_dir, tmp, name)
+    _write_manifest(catalog_dir, {"segments": [name], "version": version})
+    for seg_name in old:
+        shutil.rmtree(os.path.join(catalog_dir, seg_name), ignore_errors=True)
+    return n
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# QUERY
+# ═════════════════════════════════════════════════════════════════════════════
+
+class CatalogIndex:
+    def __init__(self, catalog_dir: str = CATALOG_DIR):
+        self.catalog_dir = catalog_dir
+        manifest = _read_manifest(catalog_dir)
+        self.version = manifest["version"]
+        self.segments = [_Segment(os.path.join(catalog_dir, s)) for s in manifest["segments"]]
+        self.total_rows = sum(seg.rows for seg in self.segments)
+        # Document frequency across segments, for IDF weighting
+        self._df: dict[str, int] = {}
+        for seg in self.segments:
+            for term, (_, count) in seg.terms.items():
+                self._df[term] = self._df.get(term, 0) + count
+        # Searches in flight; close() waits for them before closing segment files
+        self._state_lock = threading.Lock()
+        self._readers = 0
+        self._closing = False
+        self._closed = False
+
+    def search(self, text: str, budget_min: float | None = 0, budget_max: float | None = None,
+               colors=None, top_n: int = 6) -> list[dict]:
+        """
+        Top-N live products matching `text` with price in [budget_min, budget_max]
+        (budget_max=None means no upper limit), ranked by keyword relevance plus
+        color boost; equal scores go to the cheaper product.
+        """
+        with self._state_lock:
+            if self._closed:
+                return []
+            self._readers += 1
+        try:
+            return self._search(text, budget_min, budget_max, colors, top_n)
+        finally:
+            with self._state_lock:
+                self._readers -= 1
+                close_now = self._closing and not self._readers and not self._closed
+                if close_now:
+                    self._closed = True
+            if close_now:
+                self._close_segments()
+
+    def _search(self, text: str, budget_min, budget_max, colors, top_n: int) -> list[dict]:
+        import numpy as np
+
+        terms = [t for t in dict.fromkeys(tokenize(text)) if t in self._df]
+        if not terms or not self.total_rows:
+            return []
+        lo_price = float(budget_min or 0)
+        hi_price = float("inf") if budget_max is None else float(budget_max)
+        wanted_colors = color_mask(colors or [])
+        idf = {t: math.log(1 + self.total_rows / self._df[t]) for t in terms}
+
+        hits = []   # (score, price, segment index, row)
+        for si, seg in enumerate(self.segments):
+            postings, weights = [], []
+            for t in terms:
+                span = seg.terms.get(t)
+                if span and span[1]:
+                    postings.append(seg.postings[span[0]:span[0] + span[1]])
+                    weights.append(np.full(span[1], idf[t], dtype=np.float32))
+            if not postings:
+                continue
+            rows, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+
+            # Budget filter — via the sorted column when the price band is the narrower set
+            lo = np.searchsorted(seg.price_sorted, lo_price, side="left")
+            hi = np.searchsorted(seg.price_sorted, hi_price, side="right")
+            if hi - lo < len(rows):
+                keep = np.isin(rows, seg.price_order[lo:hi], assume_unique=True)
+            else:
+                prices = seg.price[rows]
+                keep = (prices >= lo_price) & (prices <= hi_price)
+            keep &= ~seg.deleted[rows]
+            rows, scores = rows[keep], scores[keep]
+            if not len(rows):
+                continue
+
+            if wanted_colors:
+                scores = scores + COLOR_BOOST * ((seg.colors[rows] & wanted_colors) != 0)
+
+            k = min(top_n, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            for i in best:
+                hits.append((float(scores[i]), float(seg.price[rows[i]]), si, int(rows[i])))
+
+        hits.sort(key=lambda h: (-h[0], h[1]))
+        results = []
+        for score, _, si, row in hits[:top_n]:
+            record = self.segments[si].record(row)
+            record["score"] = round(score, 3)
+            results.append(record)
+        return results
+
+    def close(self) -> None:
+        """Close segment files — deferred until searches already running have finished."""
+        with self._state_lock:
+            self._closing = True
+            if self._readers or self._closed:
+                return
+            self._closed = True
+        self._close_segments()
+
+    def _close_segments(self) -> None:
+        for seg in self.segments:
+            seg.close()
+
+
+_index: CatalogIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_catalog(catalog_dir: str = CATALOG_DIR) -> CatalogIndex | None:
+    """Process-wide index, reopened when a new feed has been ingested. None if no catalog."""
+    global _index
+    manifest_path = os.path.join(catalog_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    version = _read_manifest(catalog_dir)["version"]
+    with _index_lock:
+        if _index is None or _index.catalog_dir != catalog_dir or _index.version != version:
+            try:
+                index = CatalogIndex(catalog_dir)
+            except (OSError, ValueError) as e:
+                log.warning(f"[Catalog] Could not open {catalog_dir}: {e}")
+                return None
+            if _index is not None:
+                _index.close()   # one records.jsonl handle per segment otherwise leaks per ingest
+            _index = index
+        return _index
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="StyleAI product catalog.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="add a CSV/JSONL feed as a new segment")
+    p_ingest.add_argument("feed")
+    p_compact = sub.add_parser("compact", help="merge all segments, dropping replaced rows")
+    p_search = sub.add_parser("search", help="query the catalog")
+    p_search.add_argument("text")
+    p_search.add_argument("--min", type=float, default=0)
+    p_search.add_argument("--max", type=float, default=float("inf"))
+    p_search.add_argument("--colors", default="")
+    p_search.add_argument("--top", type=int, default=6)
+    for p in (p_ingest, p_compact, p_search):
+        p.add_argument("--dir", default=CATALOG_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        print(f"{ingest(args.feed, args.dir)} products ingested")
+    elif args.command == "compact":
+        print(f"{compact(args.dir)} live products after compaction")
+    else:
+        index = get_catalog(args.dir)
+        if index is None:
+            print(f"No catalog in {args.dir}")
+            return 1
+        start = time.perf_counter()
+        results = index.search(args.text, args.min, args.max, args.colors.split(",") if args.colors else [], args.top)
+        elapsed = (time.perf_counter() - start) * 1000
+        for r in results:
+            print(f"{r['price']:>10.2f}  {r['score']:>6.2f}  {r['sku']:<16} {r['title']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
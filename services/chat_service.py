@@ -1,11 +1,12 @@
-import os
+import re
 import time
-from google import genai
-from dotenv import load_dotenv
+import asyncio
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+from services.clients import get_genai_client
+from services.conversation_service import ChatMemory, has_recommendation
+from services.metrics_service import record_upstream, error_status, retry_sleep, retry_sleep_async
+from services.profiling_service import profiled
+from services.response_cache import CHAT_CACHE
 
 MODEL = "models/gemini-2.5-flash"
 
@@ -17,32 +18,179 @@ Be practical and modern.
 Keep responses under 4 sentences.
 """
 
+BUSY_MESSAGE = "⚠️ StyleAI is busy. Please wait a few seconds and try again."
+
+# Questions about "my outfit" / "me" / "what you suggested" need the personal
+# context, never a shared answer
+_PERSONAL = re.compile(
+    r"\b(i|i'm|im|me|my|mine|myself|this|these|that|it|you|your|yours|recommend\w*|suggest\w*)\b",
+    re.IGNORECASE,
+)
+
 
-def _call_gemini(prompt, retries=3):
+def _call_gemini(prompt, retries=3, backoff=True):
     for attempt in range(retries):
+        start = time.perf_counter()
         try:
-            response = client.models.generate_content(
+            response = get_genai_client().models.generate_content(
                 model=MODEL,
                 contents=prompt
             )
+            record_upstream("gemini_chat", 200, time.perf_counter() - start)
             return response.text.strip()
 
         except Exception as e:
             error_text = str(e)
+            record_upstream("gemini_chat", error_status(e), time.perf_counter() - start)
 
             if "429" in error_text:
-                time.sleep(8)
+                if not backoff:
+                    break
+                retry_sleep("gemini_chat", 8)
+            else:
+                raise e
+
+    return BUSY_MESSAGE
+
+
+async def _call_gemini_async(prompt, retries=3, backoff=True):
+    for attempt in range(retries):
+        start = time.perf_counter()
+        try:
+            response = await get_genai_client().aio.models.generate_content(
+                model=MODEL,
+                contents=prompt
+            )
+            record_upstream("gemini_chat", 200, time.perf_counter() - start)
+            return response.text.strip()
+
+        except Exception as e:
+            record_upstream("gemini_chat", error_status(e), time.perf_counter() - start)
+            if "429" in str(e):
+                if not backoff:
+                    break
+                await retry_sleep_async("gemini_chat", 8)
             else:
                 raise e
 
-    return "⚠️ StyleAI is busy. Please wait a few seconds and try again."
+    return BUSY_MESSAGE
+
+
+def _summary_prompt(previous: str, transcript: str, max_words: int) -> str:
+    return f"""
+Update the running summary of a fashion chat between a user and StyleAI.
+Keep the user's preferences, constraints and any advice already given.
+Reply with the summary only, at most {max_words} words.
 
+Current summary:
+{previous or "(none)"}
 
-def chat_response(message: str) -> str:
-    prompt = f"""
+New messages:
+{transcript}
+"""
+
+
+def _summarize(previous: str, transcript: str, max_words: int) -> str | None:
+    try:
+        summary = _call_gemini(_summary_prompt(previous, transcript, max_words), retries=1, backoff=False)
+    except Exception:
+        return None
+    return None if summary == BUSY_MESSAGE else summary
+
+
+async def _summarize_async(previous: str, transcript: str, max_words: int) -> str | None:
+    try:
+        summary = await _call_gemini_async(_summary_prompt(previous, transcript, max_words), retries=1, backoff=False)
+    except Exception:
+        return None
+    return None if summary == BUSY_MESSAGE else summary
+
+
+def _is_cacheable(message: str, memory: ChatMemory | None, profile: str = "") -> bool:
+    # Only opening, generic questions asked before there is a report to ask
+    # about — follow-ups depend on the conversation, report questions on the report
+    return ((memory is None or memory.is_empty())
+            and not has_recommendation(profile)
+            and not _PERSONAL.search(message))
+
+
+def _audience_context(audience: str) -> str:
+    # The only profile a shared (cached) answer may be written for
+    return f"User style profile:\n{audience}" if audience else ""
+
+
+def _build_prompt(message: str, context: str = "") -> str:
+    return f"""
 {SYSTEM_PROMPT}
+{context}
 
 User: {message}
 StyleAI:
 """
-    return _call_gemini(prompt)
\ No newline at end of file
+
+
+@profiled()
+def chat_response(
+    message: str,
+    memory: ChatMemory | None = None,
+    profile: str = "",
+    audience: str = "",
+) -> str:
+    """
+    Answer `message`. With a ChatMemory, recent turns, a rolling summary of
+    older ones and the user's style profile are sent under a fixed token
+    budget, and the exchange is recorded in the memory.
+
+    Generic opening questions asked before a recommendation exists are
+    answered for the coarse `audience` only and go through the process-wide
+    semantic cache, so near-duplicates from any session skip Gemini. Their
+    answers are shared, so nothing more personal than `audience` is sent.
+    """
+    if _is_cacheable(message, memory, profile):
+        reply = CHAT_CACHE.get(message, namespace=audience)
+        if reply is None:
+            reply = _call_gemini(_build_prompt(message, _audience_context(audience)))
+            if reply != BUSY_MESSAGE:
+                CHAT_CACHE.put(message, reply, namespace=audience)
+    else:
+        context = ""
+        if memory is not None:
+            memory.compact(_summarize)
+            context = memory.context(profile or audience)
+        elif profile or audience:
+            context = f"User style profile:\n{profile or audience}"
+        reply = _call_gemini(_build_prompt(message, context))
+
+    if memory is not None:
+        memory.add("user", message)
+        memory.add("assistant", reply)
+    return reply
+
+
+@profiled()
+async def chat_response_async(
+    message: str,
+    memory: ChatMemory | None = None,
+    profile: str = "",
+    audience: str = "",
+) -> str:
+    """Async chat_response — same caching and memory handling."""
+    if _is_cacheable(message, memory, profile):
+        reply = await asyncio.to_thread(CHAT_CACHE.get, message, audience)
+        if reply is None:
+            reply = await _call_gemini_async(_build_prompt(message, _audience_context(audience)))
+            if reply != BUSY_MESSAGE:
+                await asyncio.to_thread(CHAT_CACHE.put, message, reply, audience)
+    else:
+        context = ""
+        if memory is not None:
+            await memory.compact_async(_summarize_async)
+            context = memory.context(profile or audience)
+        elif profile or audience:
+            context = f"User style profile:\n{profile or audience}"
+        reply = await _call_gemini_async(_build_prompt(message, context))
+
+    if memory is not None:
+        memory.add("user", message)
+        memory.add("assistant", reply)
+    return reply
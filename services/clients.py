@@ -0,0 +1,85 @@
+import os
+import threading
+import weakref
+
+# ── Shared, lazily created clients ────────────────────────────────────────────
+# Heavy SDKs (google-genai pulls in pydantic + httpx) are imported on first use,
+# so importing a service module — and therefore app.py — stays cheap.
+
+_lock = threading.Lock()
+_env_loaded = False
+_genai_client = None
+_http_session = None
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def load_env() -> None:
+    """Load .env once per process (every service used to call load_dotenv itself)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+# Every service imports this module before reading its config, so .env is in
+# place for module-level os.getenv() calls
+load_env()
+
+# Upper bound on concurrent upstream connections per event loop
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "100"))
+
+
+def get_genai_client():
+    """Single google-genai Client shared by every service."""
+    global _genai_client
+    if _genai_client is None:
+        load_env()
+        with _lock:
+            if _genai_client is None:
+                from google import genai
+                _genai_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    return _genai_client
+
+
+def get_http_session():
+    """Shared requests.Session — keeps TLS connections to HF / Unsplash warm."""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                import requests
+                _http_session = requests.Session()
+    return _http_session
+
+
+def get_async_http_client():
+    """
+    Shared httpx.AsyncClient for the running event loop. Connection pools are
+    bound to the loop that created them, so each loop gets its own client.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        import httpx
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=ASYNC_MAX_CONNECTIONS),
+            timeout=30,
+        )
+        with _lock:
+            _async_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """Close this loop's client — call before the loop shuts down."""
+    import asyncio
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,198 @@
+import os
+import threading
+
+from services.clients import load_env
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Rough budget for everything sent besides the system prompt and new message
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "1200"))
+MAX_HISTORY_TURNS    = int(os.getenv("CHAT_MAX_TURNS", "30"))    # kept server-side per session
+PROFILE_TOKEN_SHARE  = 0.25
+SUMMARY_TOKEN_SHARE  = 0.25
+MAX_TURN_CHARS       = 1200   # a single pasted wall of text can't eat the whole window
+# Evicted turns are summarized in batches: once this many pile up, or once they no
+# longer fit verbatim beside the summary — not one Gemini call per reply
+SUMMARIZE_AFTER_TURNS = int(os.getenv("CHAT_SUMMARIZE_TURNS", "6"))
+
+CHARS_PER_TOKEN = 4           # good enough for English chat — no tokenizer dependency
+
+# Profile fields coarse enough that a cached answer fits everyone who shares them
+AUDIENCE_KEYS = ("gender", "occasion", "style")
+
+# Prefix of the profile lines that carry the user's own recommendation
+RECOMMENDED_PREFIX = "Recommended "
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(0, max_chars - 1)].rstrip() + "…"
+
+
+def _clip_tail(text: str, max_tokens: int) -> str:
+    # Keep the end — for a running transcript the newest text matters most
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return "…" + text[len(text) - max(0, max_chars - 1):].lstrip()
+
+
+def _format_turn(turn: dict) -> str:
+    speaker = "User" if turn["role"] == "user" else "StyleAI"
+    return f"{speaker}: {turn['text']}"
+
+
+def style_profile(inputs: dict, recommendation: dict | None = None) -> str:
+    """One-paragraph profile of the user and their current recommendation."""
+    parts = [
+        f"{k.replace('_', ' ')}: {', '.join(map(str, v)) if isinstance(v, list) else v}"
+        for k, v in inputs.items()
+        if v not in (None, "", [])
+    ]
+    lines = ["; ".join(parts)]
+    for field in ("outfit", "hairstyle", "makeup"):
+        if recommendation and recommendation.get(field):
+            lines.append(f"{RECOMMENDED_PREFIX}{field}: {recommendation[field]}")
+    return "\n".join(lines)
+
+
+def has_recommendation(profile: str) -> bool:
+    return any(line.startswith(RECOMMENDED_PREFIX) for line in profile.splitlines())
+
+
+def style_audience(inputs: dict) -> str:
+    """Coarse profile shared by many users — safe to key shared answers on."""
+    return "; ".join(f"{k}: {inputs.get(k)}" for k in AUDIENCE_KEYS if inputs.get(k))
+
+
+class ChatMemory:
+    """
+    Per-session chat state with constant size.
+
+    `turns` holds recent messages (capped at MAX_HISTORY_TURNS); anything that
+    no longer fits the token window moves to `pending`. Pending turns are sent
+    verbatim in the summary's share of the budget until SUMMARIZE_AFTER_TURNS
+    of them pile up or they outgrow that share; then one Gemini call folds
+    them all into `summary`, which is only ever extended incrementally.
+    """
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, max_turns: int = MAX_HISTORY_TURNS):
+        self.budget = budget
+        self.max_turns = max_turns
+        self.turns: list[dict] = []
+        self.pending: list[dict] = []
+        self.summary = ""
+        self._lock = threading.Lock()
+
+    @property
+    def _history_budget(self) -> int:
+        return int(self.budget * (1 - PROFILE_TOKEN_SHARE - SUMMARY_TOKEN_SHARE))
+
+    @property
+    def _summary_budget(self) -> int:
+        return int(self.budget * SUMMARY_TOKEN_SHARE)
+
+    def add(self, role: str, text: str) -> None:
+        with self._lock:
+            self.turns.append({"role": role, "text": text[:MAX_TURN_CHARS]})
+            self._rebalance()
+
+    def _rebalance(self) -> None:
+        # Caller holds the lock. Always keep the newest turn verbatim.
+        used = sum(estimate_tokens(_format_turn(t)) for t in self.turns)
+        while len(self.turns) > 1 and (used > self._history_budget or len(self.turns) > self.max_turns):
+            oldest = self.turns.pop(0)
+            used -= estimate_tokens(_format_turn(oldest))
+            self.pending.append(oldest)
+        # Pending only grows if summarization keeps failing — bound it too
+        if len(self.pending) > self.max_turns:
+            self.pending = self.pending[-self.max_turns:]
+
+    def is_empty(self) -> bool:
+        return not (self.turns or self.pending or self.summary)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.turns.clear()
+            self.pending.clear()
+            self.summary = ""
+
+    def _take_pending(self):
+        with self._lock:
+            if not self.pending:
+                return None
+            pending, previous = list(self.pending), self.summary
+        transcript = "\n".join(_format_turn(t) for t in pending)
+        if (len(pending) < SUMMARIZE_AFTER_TURNS
+                and estimate_tokens(previous) + estimate_tokens(transcript) <= self._summary_budget):
+            return None   # still fits verbatim — wait and summarize a bigger batch
+        max_words = max(20, self._summary_budget * CHARS_PER_TOKEN // 6)
+        return pending, previous, transcript, max_words
+
+    def _store_summary(self, pending: list, previous: str, transcript: str, new_summary: str | None) -> None:
+        if new_summary:
+            new_summary = _clip(new_summary, self._summary_budget)
+        else:
+            new_summary = _clip_tail(f"{previous}\n{transcript}".strip(), self._summary_budget)
+
+        with self._lock:
+            self.summary = new_summary
+            self.pending = self.pending[len(pending):]
+
+    def compact(self, summarize) -> None:
+        """
+        Fold pending turns into the rolling summary once enough have piled up.
+        `summarize(previous_summary, transcript, max_words)` returns the new summary
+        or None on failure, in which case the most recent text is kept extractively.
+        """
+        taken = self._take_pending()
+        if taken is None:
+            return
+        pending, previous, transcript, max_words = taken
+        self._store_summary(pending, previous, transcript, summarize(previous, transcript, max_words))
+
+    async def compact_async(self, summarize) -> None:
+        """compact() with an async `summarize`."""
+        taken = self._take_pending()
+        if taken is None:
+            return
+        pending, previous, transcript, max_words = taken
+        self._store_summary(pending, previous, transcript, await summarize(previous, transcript, max_words))
+
+    def context(self, profile: str = "") -> str:
+        """Profile, summary and recent turns, all within the token budget."""
+        with self._lock:
+            summary, pending, turns = self.summary, list(self.pending), list(self.turns)
+
+        # Turns not yet summarized fill whatever the summary leaves of its share
+        earlier = [summary] if summary else []
+        room = self._summary_budget - estimate_tokens(summary)
+        if pending and room > 0:
+            earlier.append(_clip_tail("\n".join(_format_turn(t) for t in pending), room))
+
+        sections = []
+        if profile:
+            sections.append("User style profile:\n" + _clip(profile, int(self.budget * PROFILE_TOKEN_SHARE)))
+        if earlier:
+            sections.append("Earlier in this conversation:\n" + "\n".join(earlier))
+
+        remaining = self.budget - sum(estimate_tokens(s) for s in sections)
+        recent = []
+        for turn in reversed(turns):
+            line = _format_turn(turn)
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            recent.append(line)
+            remaining -= cost
+        if recent:
+            sections.append("Recent conversation:\n" + "\n".join(reversed(recent)))
+
+        return "\n\n".join(sections)
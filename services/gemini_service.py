@@ -1,12 +1,9 @@
-import os
 import json
 import time
-from google import genai
-from dotenv import load_dotenv
 
-load_dotenv()
-
-client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+from services.clients import get_genai_client
+from services.metrics_service import record_upstream, error_status, retry_sleep, retry_sleep_async
+from services.profiling_service import profiled
 
 # Use ONE stable model only
 MODEL = "models/gemini-2.5-flash"
@@ -17,27 +14,54 @@ def _call_gemini(prompt, retries=3):
     Safe Gemini call with retry for 429 errors
     """
     for attempt in range(retries):
+        start = time.perf_counter()
         try:
-            response = client.models.generate_content(
+            response = get_genai_client().models.generate_content(
                 model=MODEL,
                 contents=prompt
             )
+            record_upstream("gemini", 200, time.perf_counter() - start)
             return response.text
 
         except Exception as e:
             error_text = str(e)
+            record_upstream("gemini", error_status(e), time.perf_counter() - start)
 
             # Rate limit handling
             if "429" in error_text:
-                time.sleep(10)
+                retry_sleep("gemini", 10)
             else:
                 raise e
 
     raise Exception("Gemini rate limit exceeded. Please try again.")
 
 
-def get_style_recommendation(data):
-    prompt = f"""
+async def _call_gemini_async(prompt, retries=3):
+    """
+    _call_gemini on the SDK's asyncio client — the 429 backoff doesn't block the loop
+    """
+    for attempt in range(retries):
+        start = time.perf_counter()
+        try:
+            response = await get_genai_client().aio.models.generate_content(
+                model=MODEL,
+                contents=prompt
+            )
+            record_upstream("gemini", 200, time.perf_counter() - start)
+            return response.text
+
+        except Exception as e:
+            record_upstream("gemini", error_status(e), time.perf_counter() - start)
+            if "429" in str(e):
+                await retry_sleep_async("gemini", 10)
+            else:
+                raise e
+
+    raise Exception("Gemini rate limit exceeded. Please try again.")
+
+
+def _build_prompt(data):
+    return f"""
 You are StyleAI, a professional fashion stylist.
 
 User details:
@@ -67,8 +91,8 @@ Return ONLY JSON in this format:
 }}
 """
 
-    text = _call_gemini(prompt)
 
+def _parse_recommendation(text):
     # Extract JSON safely
     start = text.find("{")
     end = text.rfind("}") + 1
@@ -76,4 +100,14 @@ Return ONLY JSON in this format:
     if start == -1 or end == -1:
         raise Exception("Invalid response from AI")
 
-    return json.loads(text[start:end])
\ No newline at end of file
+    return json.loads(text[start:end])
+
+
+@profiled()
+def get_style_recommendation(data):
+    return _parse_recommendation(_call_gemini(_build_prompt(data)))
+
+
+@profiled()
+async def get_style_recommendation_async(data):
+    return _parse_recommendation(await _call_gemini_async(_build_prompt(data)))
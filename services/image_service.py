@@ -1,18 +1,29 @@
 import os
 import time
+import asyncio
+import tempfile
 import base64
 import logging
-import requests
+import threading
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from PIL import Image, ImageDraw, ImageFilter
-from dotenv import load_dotenv
 
-load_dotenv()
+from services.cache_service import BytesLRU, PersistentTTLCache
+from services.clients import get_async_http_client, get_http_session, load_env
+from services.metrics_service import IMAGE_JOBS_IN_FLIGHT, record_upstream, retry_sleep, retry_sleep_async
+from services.profiling_service import profiled
+from services.prompt_service import canonicalize, dedupe_prompts, prompt_cache_key
+from services.session_store import encode_image
+from services.warmup_service import WARMUP_ENABLED, ModelWarmer
+
+load_env()
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
 log = logging.getLogger(__name__)
+# httpx logs every request URL at INFO — keep the app log to our own messages
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # ── Config ────────────────────────────────────────────────────────────────────
 HF_TOKEN     = os.getenv("HF_TOKEN")
@@ -31,6 +42,26 @@ TIMEOUT     = 30
 MAX_RETRIES = 2
 RETRY_SLEEP = 8
 
+# Warm-up pings block until the model is loaded — that wait belongs to the scheduler
+WARMUP_TIMEOUT = 120
+
+# Unsplash — one search serves every user until the TTL runs out (hourly quota is the ceiling)
+# Empty counts as unset — sqlite3.connect("") would open a private temporary database
+UNSPLASH_CACHE_PATH  = (os.getenv("UNSPLASH_CACHE_PATH")
+                        or os.path.join(tempfile.gettempdir(), "styleai-unsplash.sqlite3"))
+UNSPLASH_CACHE_TTL   = float(os.getenv("UNSPLASH_CACHE_TTL", str(24 * 3600)))
+UNSPLASH_PHOTO_BYTES = int(os.getenv("UNSPLASH_PHOTO_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Unsplash renditions by width, smallest first; "full" is the original size
+UNSPLASH_TIERS = (("thumb", 200), ("small", 400), ("regular", 1080), ("full", None))
+
+UNSPLASH_SEARCH_CACHE = PersistentTTLCache("unsplash_search", UNSPLASH_CACHE_PATH, UNSPLASH_CACHE_TTL)
+UNSPLASH_PHOTO_CACHE  = BytesLRU("unsplash_photo", UNSPLASH_PHOTO_BYTES)
+
+# Generated images keyed on canonical prompt + model + params, shared by every user
+GENERATED_IMAGE_BYTES = int(os.getenv("GENERATED_IMAGE_CACHE_BYTES", str(64 * 1024 * 1024)))
+GENERATED_IMAGE_CACHE = BytesLRU("generated_image", GENERATED_IMAGE_BYTES)
+
 
 # ═════════════════════════════════════════════════════════════════════════════
 # UTILITIES
@@ -50,6 +81,22 @@ def _resize_keep_aspect(img: Image.Image, max_side: int = 512) -> Image.Image:
     return img.resize((int(w * scale), int(h * scale)), Image.LANCZOS)
 
 
+def _is_timeout(error: Exception) -> bool:
+    # Both HTTP clients are imported lazily by services.clients — check the one that raised
+    module = type(error).__module__
+    if module.startswith("httpx"):
+        import httpx
+        return isinstance(error, httpx.TimeoutException)
+    if module.startswith("requests"):
+        from requests.exceptions import Timeout
+        return isinstance(error, Timeout)
+    return False
+
+
+def _decode_image(data: bytes) -> Image.Image:
+    return Image.open(BytesIO(data)).convert("RGB")
+
+
 def _make_placeholder(text: str, size=(400, 400)) -> Image.Image:
     img = Image.new("RGB", size, color=(40, 40, 50))
     draw = ImageDraw.Draw(img)
@@ -61,59 +108,107 @@ def _make_placeholder(text: str, size=(400, 400)) -> Image.Image:
 # CORE HF CALL
 # ═════════════════════════════════════════════════════════════════════════════
 
+def _text2img_payload(prompt: str) -> dict:
+    return {
+        "inputs": prompt,
+        "parameters": TURBO_PARAMS,
+        "options": {"wait_for_model": True},
+    }
+
+
+def _text2img_backoff(status: int, body: str) -> float | None:
+    """Seconds to wait before retrying a failed text2img call, or None to give up."""
+    if status == 503:
+        log.warning(f"[HF] Model loading, waiting {RETRY_SLEEP}s…")
+        return RETRY_SLEEP
+    if status == 401:
+        log.error("[HF] ❌ Invalid HF_TOKEN")
+        return None
+    if status == 429:
+        log.warning("[HF] Rate limited, waiting…")
+        return RETRY_SLEEP * 2
+    log.error(f"[HF] Status {status}: {body[:200]}")
+    return RETRY_SLEEP
+
+
 def _hf_text2img(prompt: str, model: str = FAST_MODEL) -> Image.Image | None:
     if not HF_TOKEN:
         log.error("HF_TOKEN not set in .env")
         return None
 
     url = f"{HF_BASE_URL}/{model}"
-    payload = {
-        "inputs": prompt,
-        "parameters": TURBO_PARAMS,
-        "options": {"wait_for_model": True},
-    }
+    payload = _text2img_payload(prompt)
 
     for attempt in range(1, MAX_RETRIES + 1):
+        start = time.perf_counter()
         try:
             log.info(f"[HF] Attempt {attempt} | {model}")
-            resp = requests.post(url, headers=HF_HEADERS, json=payload, timeout=TIMEOUT)
+            with IMAGE_JOBS_IN_FLIGHT.track_inprogress():
+                resp = get_http_session().post(url, headers=HF_HEADERS, json=payload, timeout=TIMEOUT)
+            record_upstream("hf_text2img", resp.status_code, time.perf_counter() - start)
+            WARMER.note_status(model, resp.status_code)
 
             if resp.status_code == 200:
                 log.info("[HF] ✅ Success")
-                return Image.open(BytesIO(resp.content)).convert("RGB")
-            elif resp.status_code == 503:
-                log.warning(f"[HF] Model loading, waiting {RETRY_SLEEP}s…")
-                time.sleep(RETRY_SLEEP)
-            elif resp.status_code == 401:
-                log.error("[HF] ❌ Invalid HF_TOKEN")
+                return _decode_image(resp.content)
+            delay = _text2img_backoff(resp.status_code, resp.text)
+            if delay is None:
                 return None
-            elif resp.status_code == 429:
-                log.warning("[HF] Rate limited, waiting…")
-                time.sleep(RETRY_SLEEP * 2)
-            else:
-                log.error(f"[HF] Status {resp.status_code}: {resp.text[:200]}")
-                time.sleep(RETRY_SLEEP)
+            retry_sleep("hf_text2img", delay)
 
-        except requests.exceptions.Timeout:
-            log.warning(f"[HF] Timeout on attempt {attempt}")
         except Exception as e:
+            if _is_timeout(e):
+                record_upstream("hf_text2img", "timeout", time.perf_counter() - start)
+                log.warning(f"[HF] Timeout on attempt {attempt}")
+                continue
+            record_upstream("hf_text2img", "error", time.perf_counter() - start)
             log.error(f"[HF] Error: {e}")
             return None
 
     return None
 
 
-def _hf_img2img(prompt: str, init_image: Image.Image, strength: float = 0.6) -> Image.Image | None:
-    if not HF_TOKEN:
-        return None
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
 
-    url = f"{HF_BASE_URL}/{INPAINT_MODEL}"
+
+def _text2img_cached(prompt: str, model: str = FAST_MODEL) -> Image.Image | None:
+    """
+    _hf_text2img on the canonical prompt, through the shared image cache.
+    Concurrent requests for the same key wait on the one call already in flight.
+    """
+    canonical = canonicalize(prompt)
+    key = prompt_cache_key(canonical, model, TURBO_PARAMS)
+    data = GENERATED_IMAGE_CACHE.get(key)
+    if data is not None:
+        return _decode_image(data)
+
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        owner = pending is None
+        if owner:
+            pending = _inflight[key] = Future()
+    if not owner:
+        return pending.result()
+
+    img = None
+    try:
+        img = _hf_text2img(canonical, model)
+        if img is not None:
+            GENERATED_IMAGE_CACHE.put(key, encode_image(img))
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        pending.set_result(img)
+    return img
+
+
+def _img2img_payload(prompt: str, init_image: Image.Image, strength: float) -> dict:
     init_resized = init_image.resize((512, 512), Image.LANCZOS)
     buf = BytesIO()
     init_resized.save(buf, format="PNG")
     img_b64 = base64.b64encode(buf.getvalue()).decode()
-
-    payload = {
+    return {
         "inputs": prompt,
         "parameters": {
             "init_image": img_b64,
@@ -124,22 +219,70 @@ def _hf_img2img(prompt: str, init_image: Image.Image, strength: float = 0.6) ->
         "options": {"wait_for_model": True},
     }
 
+
+def _hf_img2img(prompt: str, init_image: Image.Image, strength: float = 0.6) -> Image.Image | None:
+    if not HF_TOKEN:
+        return None
+
+    url = f"{HF_BASE_URL}/{INPAINT_MODEL}"
+    payload = _img2img_payload(prompt, init_image, strength)
+
     for attempt in range(1, MAX_RETRIES + 1):
+        start = time.perf_counter()
         try:
-            resp = requests.post(url, headers=HF_HEADERS, json=payload, timeout=60)
+            with IMAGE_JOBS_IN_FLIGHT.track_inprogress():
+                resp = get_http_session().post(url, headers=HF_HEADERS, json=payload, timeout=60)
+            record_upstream("hf_img2img", resp.status_code, time.perf_counter() - start)
+            WARMER.note_status(INPAINT_MODEL, resp.status_code)
             if resp.status_code == 200:
-                return Image.open(BytesIO(resp.content)).convert("RGB")
+                return _decode_image(resp.content)
             elif resp.status_code == 503:
-                time.sleep(RETRY_SLEEP * attempt)
+                # Model loading — the warm-up scheduler takes over, caller falls back to blend
+                log.warning("[img2img] Model loading, routing to blend fallback")
+                return None
             else:
                 log.error(f"[img2img] {resp.status_code}: {resp.text[:200]}")
-                time.sleep(RETRY_SLEEP)
+                retry_sleep("hf_img2img", RETRY_SLEEP)
         except Exception as e:
+            record_upstream("hf_img2img", "error", time.perf_counter() - start)
             log.error(f"[img2img] Error attempt {attempt}: {e}")
 
     return None
 
 
+# ═════════════════════════════════════════════════════════════════════════════
+# MODEL WARM-UP  — keeps HF endpoints loaded so users don't pay cold starts
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _hf_ping(model: str) -> int | None:
+    """Smallest useful inference call for `model`; returns the HTTP status."""
+    if model == INPAINT_MODEL:
+        parameters = {
+            "init_image": _pil_to_base64(Image.new("RGB", (64, 64), (128, 128, 128))),
+            "strength": 0.1,
+            "num_inference_steps": 1,
+        }
+    else:
+        parameters = {"num_inference_steps": 1, "width": 256, "height": 256}
+
+    resp = get_http_session().post(
+        f"{HF_BASE_URL}/{model}",
+        headers=HF_HEADERS,
+        json={"inputs": "warm-up", "parameters": parameters, "options": {"wait_for_model": True}},
+        timeout=WARMUP_TIMEOUT,
+    )
+    return resp.status_code
+
+
+WARMER = ModelWarmer([FAST_MODEL, INPAINT_MODEL], ping=_hf_ping)
+
+
+def start_model_warmup() -> None:
+    """Ping both models now and on HF_KEEPALIVE_INTERVAL. Safe to call every rerun."""
+    if HF_TOKEN and WARMUP_ENABLED:
+        WARMER.start()
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # 1. OUTFIT IMAGES  — generated in PARALLEL
 # ═════════════════════════════════════════════════════════════════════════════
@@ -151,57 +294,121 @@ def _build_outfit_prompt(desc: str, style_context: str) -> str:
     )
 
 
+def _encode_all(images: list, include_base64: bool) -> list[str | None]:
+    return [_pil_to_base64(img) if img and include_base64 else None for img in images]
+
+
+@profiled()
 def generate_outfit_images(
     outfit_descriptions: list[str],
     style_context: str = "",
+    include_base64: bool = True,
 ) -> list[dict]:
     """
     Generate outfit images in PARALLEL — all start at the same time.
     Returns list of dicts: {prompt, image, base64}
+    Pass include_base64=False to skip the PNG copy (base64 is then None).
+    Near-identical descriptions share one generation.
     """
-    prompts = [_build_outfit_prompt(d, style_context) for d in outfit_descriptions]
+    if not outfit_descriptions:
+        return []
+    # Dedupe on the descriptions — the shared template would make every prompt look alike
+    unique, slots = dedupe_prompts(outfit_descriptions)
+    context = canonicalize(style_context)
+    prompts = [_build_outfit_prompt(d, context) for d in unique]
 
     # Parallel calls — 3 images generate simultaneously instead of sequentially
-    results = [None] * len(prompts)
+    images = [None] * len(prompts)
     with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
         future_to_idx = {
-            executor.submit(_hf_text2img, prompt): i
+            executor.submit(_text2img_cached, prompt): i
             for i, prompt in enumerate(prompts)
         }
         for future in as_completed(future_to_idx):
-            i = future_to_idx[future]
-            img = future.result()
-            results[i] = {
-                "prompt": outfit_descriptions[i],
-                "image": img,
-                "base64": _pil_to_base64(img) if img else None,
-            }
+            images[future_to_idx[future]] = future.result()
 
-    return results
+    encoded = _encode_all(images, include_base64)
+    return [
+        {"prompt": desc, "image": images[slot], "base64": encoded[slot]}
+        for desc, slot in zip(outfit_descriptions, slots)
+    ]
 
 
 # ═════════════════════════════════════════════════════════════════════════════
 # 2. PINTEREST INSPO  — Unsplash (instant) + AI in parallel
 # ═════════════════════════════════════════════════════════════════════════════
 
-def _fetch_unsplash(query: str, count: int = 3) -> list[Image.Image]:
+def _unsplash_rendition(urls: dict, display_width: int) -> str | None:
+    """Smallest rendition at least `display_width` pixels wide."""
+    for tier, width in UNSPLASH_TIERS:
+        if urls.get(tier) and (width is None or width >= display_width):
+            return urls[tier]
+    return urls.get("regular") or urls.get("small")
+
+
+UNSPLASH_SEARCH_URL = "https://api.unsplash.com/search/photos"
+
+
+def _unsplash_cache_key(query: str, count: int) -> str:
+    return f"{' '.join(query.lower().split())}|{count}|portrait"
+
+
+def _unsplash_params(query: str, count: int) -> dict:
+    return {"query": query, "per_page": count, "orientation": "portrait"}
+
+
+def _unsplash_headers() -> dict:
+    # Header, not ?client_id= — request URLs end up in HTTP client logs
+    return {"Authorization": f"Client-ID {UNSPLASH_KEY}"}
+
+
+def _slim_photos(payload: dict) -> list[dict]:
+    # Only what rendering needs — the full search payload is ~10 KB per photo
+    return [{"id": p.get("id"), "urls": p.get("urls", {})} for p in payload.get("results", [])]
+
+
+def _search_unsplash(query: str, count: int) -> list[dict] | None:
+    """Photo metadata for `query`, from the persistent cache when possible."""
+    cache_key = _unsplash_cache_key(query, count)
+    photos = UNSPLASH_SEARCH_CACHE.get(cache_key)
+    if photos is not None:
+        return photos
+
+    start = time.perf_counter()
+    resp = get_http_session().get(
+        UNSPLASH_SEARCH_URL, params=_unsplash_params(query, count), headers=_unsplash_headers(), timeout=10
+    )
+    record_upstream("unsplash_search", resp.status_code, time.perf_counter() - start)
+    if resp.status_code != 200:
+        return None
+
+    photos = _slim_photos(resp.json())
+    UNSPLASH_SEARCH_CACHE.put(cache_key, photos)
+    return photos
+
+
+def _fetch_unsplash(query: str, count: int = 3, display_width: int = 400) -> list[Image.Image]:
     if not UNSPLASH_KEY:
         return []
     try:
-        resp = requests.get(
-            "https://api.unsplash.com/search/photos",
-            params={"query": query, "per_page": count, "orientation": "portrait",
-                    "client_id": UNSPLASH_KEY},
-            timeout=10,
-        )
-        if resp.status_code != 200:
+        photos = _search_unsplash(query, count)
+        if not photos:
             return []
         images = []
-        for photo in resp.json().get("results", []):
-            img_url = photo["urls"].get("small")   # small = faster than regular
-            r = requests.get(img_url, timeout=10)
-            if r.status_code == 200:
-                images.append(Image.open(BytesIO(r.content)).convert("RGB"))
+        for photo in photos:
+            img_url = _unsplash_rendition(photo["urls"], display_width)
+            if not img_url:
+                continue
+            data = UNSPLASH_PHOTO_CACHE.get(img_url)
+            if data is None:
+                start = time.perf_counter()
+                r = get_http_session().get(img_url, timeout=10)
+                record_upstream("unsplash_photo", r.status_code, time.perf_counter() - start)
+                if r.status_code != 200:
+                    continue
+                data = r.content
+                UNSPLASH_PHOTO_CACHE.put(img_url, data)
+            images.append(_decode_image(data))
         log.info(f"[Unsplash] ✅ {len(images)} photos for '{query}'")
         return images
     except Exception as e:
@@ -209,32 +416,43 @@ def _fetch_unsplash(query: str, count: int = 3) -> list[Image.Image]:
         return []
 
 
+def _inspo_prompt(keyword: str) -> str:
+    return f"Pinterest fashion inspo, {keyword}, editorial aesthetic, studio"
+
+
+@profiled()
 def generate_pinterest_inspo(
     style_keywords: list[str],
     n_real: int = 2,
     n_generated: int = 1,
+    include_base64: bool = True,
+    display_width: int = 400,
 ) -> list[dict]:
     """
     Fetch Unsplash photos (fast, instant) + AI-generated inspo in parallel.
     Unsplash images appear immediately; AI images fill remaining slots.
+    display_width picks the smallest Unsplash rendition that still fills the slot.
     """
     results = []
 
     for keyword in style_keywords:
         # Unsplash fetch is fast — do first
-        real_imgs = _fetch_unsplash(f"{keyword} fashion outfit", count=n_real)
+        real_imgs = _fetch_unsplash(f"{keyword} fashion outfit", count=n_real,
+                                    display_width=display_width)
         for img in real_imgs:
             results.append({"source": "unsplash", "keyword": keyword,
-                            "image": img, "base64": _pil_to_base64(img)})
+                            "image": img, "base64": _pil_to_base64(img) if include_base64 else None})
 
         # AI images only if Unsplash didn't fill slots
         n_gen = max(0, (n_real + n_generated) - len(real_imgs))
+        if n_gen > 0 and real_imgs and WARMER.is_cold(FAST_MODEL):
+            log.info(f"[Inspo] {FAST_MODEL} is cold — showing Unsplash only for '{keyword}'")
+            n_gen = 0
         if n_gen > 0:
-            prompt = f"Pinterest fashion inspo, {keyword}, editorial aesthetic, studio"
-            img = _hf_text2img(prompt)
+            img = _text2img_cached(_inspo_prompt(keyword))
             if img:
                 results.append({"source": "generated", "keyword": keyword,
-                                "image": img, "base64": _pil_to_base64(img)})
+                                "image": img, "base64": _pil_to_base64(img) if include_base64 else None})
 
     return results
 
@@ -254,12 +472,23 @@ def _composite_overlay(user_photo: Image.Image, outfit_img: Image.Image) -> Imag
     return Image.blend(user, overlay, alpha=0.45).convert("RGB")
 
 
+def _tryon_prompts(outfit_description: str, hair_makeup_description: str, accessories: str) -> tuple[str, str]:
+    """(img2img prompt for the user's photo, text2img prompt for the blend fallback)"""
+    full_style = ", ".join(filter(None, [outfit_description, hair_makeup_description, accessories]))
+    return (
+        f"person wearing {full_style}, full body, fashion editorial, realistic",
+        f"fashion model wearing {full_style}, white background, full body",
+    )
+
+
+@profiled()
 def virtual_tryon(
     user_photo: Image.Image,
     outfit_description: str,
     hair_makeup_description: str = "",
     accessories: str = "",
     use_ai_compositing: bool = True,
+    include_base64: bool = True,
 ) -> dict:
     """
     Virtual try-on: overlays recommended outfit + hair/makeup onto user photo.
@@ -269,23 +498,22 @@ def virtual_tryon(
         return {"tryon_image": None, "base64": None, "success": False}
 
     user_resized = _resize_keep_aspect(user_photo, max_side=512)
-    full_style = ", ".join(filter(None, [outfit_description, hair_makeup_description, accessories]))
-    tryon_prompt = f"person wearing {full_style}, full body, fashion editorial, realistic"
+    tryon_prompt, fallback_prompt = _tryon_prompts(outfit_description, hair_makeup_description, accessories)
 
     tryon_result = None
     method_used = "none"
 
-    # Try AI img2img first
-    if use_ai_compositing and HF_TOKEN:
+    # Try AI img2img first — skipped while the inpainting model is known to be loading
+    if use_ai_compositing and HF_TOKEN and WARMER.is_cold(INPAINT_MODEL):
+        log.info(f"[TryOn] {INPAINT_MODEL} is cold — using blend fallback")
+    elif use_ai_compositing and HF_TOKEN:
         tryon_result = _hf_img2img(tryon_prompt, init_image=user_resized, strength=0.55)
         if tryon_result:
             method_used = "ai_img2img"
 
     # Fallback: generate outfit + blend
     if tryon_result is None:
-        outfit_img = _hf_text2img(
-            f"fashion model wearing {full_style}, white background, full body"
-        )
+        outfit_img = _hf_text2img(fallback_prompt)
         if outfit_img:
             tryon_result = _composite_overlay(user_resized, outfit_img)
             method_used = "blend_fallback"
@@ -293,7 +521,255 @@ def virtual_tryon(
     final_img = tryon_result
     return {
         "tryon_image": final_img,
-        "base64": _pil_to_base64(final_img) if final_img else None,
+        "base64": _pil_to_base64(final_img) if final_img and include_base64 else None,
         "method": method_used,
         "success": final_img is not None,
-    }
\ No newline at end of file
+    }
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# ASYNC VARIANTS  — one event loop drives every upstream call; PIL work runs in
+# worker threads via asyncio.to_thread so decoding never stalls the loop
+# ═════════════════════════════════════════════════════════════════════════════
+
+async def _hf_text2img_async(prompt: str, model: str = FAST_MODEL) -> Image.Image | None:
+    if not HF_TOKEN:
+        log.error("HF_TOKEN not set in .env")
+        return None
+
+    url = f"{HF_BASE_URL}/{model}"
+    payload = _text2img_payload(prompt)
+    client = get_async_http_client()
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            log.info(f"[HF] Attempt {attempt} | {model}")
+            with IMAGE_JOBS_IN_FLIGHT.track_inprogress():
+                resp = await client.post(url, headers=HF_HEADERS, json=payload, timeout=TIMEOUT)
+            record_upstream("hf_text2img", resp.status_code, time.perf_counter() - start)
+            WARMER.note_status(model, resp.status_code)
+
+            if resp.status_code == 200:
+                log.info("[HF] ✅ Success")
+                return await asyncio.to_thread(_decode_image, resp.content)
+            delay = _text2img_backoff(resp.status_code, resp.text)
+            if delay is None:
+                return None
+            await retry_sleep_async("hf_text2img", delay)
+
+        except Exception as e:
+            if _is_timeout(e):
+                record_upstream("hf_text2img", "timeout", time.perf_counter() - start)
+                log.warning(f"[HF] Timeout on attempt {attempt}")
+                continue
+            record_upstream("hf_text2img", "error", time.perf_counter() - start)
+            log.error(f"[HF] Error: {e}")
+            return None
+
+    return None
+
+
+# Per event loop, so a task is only ever awaited on the loop that runs it
+_inflight_async: dict[tuple, asyncio.Task] = {}
+
+
+async def _generate_and_cache_async(canonical: str, model: str, key: str) -> Image.Image | None:
+    img = await _hf_text2img_async(canonical, model)
+    if img is not None:
+        GENERATED_IMAGE_CACHE.put(key, await asyncio.to_thread(encode_image, img))
+    return img
+
+
+async def _text2img_cached_async(prompt: str, model: str = FAST_MODEL) -> Image.Image | None:
+    """Async _text2img_cached: same cache keys, concurrent callers share one task."""
+    canonical = canonicalize(prompt)
+    key = prompt_cache_key(canonical, model, TURBO_PARAMS)
+    data = GENERATED_IMAGE_CACHE.get(key)
+    if data is not None:
+        return await asyncio.to_thread(_decode_image, data)
+
+    inflight_key = (asyncio.get_running_loop(), key)
+    task = _inflight_async.get(inflight_key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_and_cache_async(canonical, model, key))
+        _inflight_async[inflight_key] = task
+        task.add_done_callback(lambda _: _inflight_async.pop(inflight_key, None))
+    # One caller being cancelled must not cancel the generation for the others
+    return await asyncio.shield(task)
+
+
+async def _hf_img2img_async(prompt: str, init_image: Image.Image, strength: float = 0.6) -> Image.Image | None:
+    if not HF_TOKEN:
+        return None
+
+    url = f"{HF_BASE_URL}/{INPAINT_MODEL}"
+    payload = await asyncio.to_thread(_img2img_payload, prompt, init_image, strength)
+    client = get_async_http_client()
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            with IMAGE_JOBS_IN_FLIGHT.track_inprogress():
+                resp = await client.post(url, headers=HF_HEADERS, json=payload, timeout=60)
+            record_upstream("hf_img2img", resp.status_code, time.perf_counter() - start)
+            WARMER.note_status(INPAINT_MODEL, resp.status_code)
+            if resp.status_code == 200:
+                return await asyncio.to_thread(_decode_image, resp.content)
+            elif resp.status_code == 503:
+                log.warning("[img2img] Model loading, routing to blend fallback")
+                return None
+            else:
+                log.error(f"[img2img] {resp.status_code}: {resp.text[:200]}")
+                await retry_sleep_async("hf_img2img", RETRY_SLEEP)
+        except Exception as e:
+            record_upstream("hf_img2img", "error", time.perf_counter() - start)
+            log.error(f"[img2img] Error attempt {attempt}: {e}")
+
+    return None
+
+
+@profiled()
+async def generate_outfit_images_async(
+    outfit_descriptions: list[str],
+    style_context: str = "",
+    include_base64: bool = True,
+) -> list[dict]:
+    """Async generate_outfit_images — same deduplication, cache and result shape."""
+    if not outfit_descriptions:
+        return []
+    unique, slots = dedupe_prompts(outfit_descriptions)
+    context = canonicalize(style_context)
+    images = await asyncio.gather(
+        *(_text2img_cached_async(_build_outfit_prompt(d, context)) for d in unique)
+    )
+    encoded = await asyncio.to_thread(_encode_all, images, include_base64)
+    return [
+        {"prompt": desc, "image": images[slot], "base64": encoded[slot]}
+        for desc, slot in zip(outfit_descriptions, slots)
+    ]
+
+
+async def _search_unsplash_async(query: str, count: int) -> list[dict] | None:
+    cache_key = _unsplash_cache_key(query, count)
+    photos = await asyncio.to_thread(UNSPLASH_SEARCH_CACHE.get, cache_key)
+    if photos is not None:
+        return photos
+
+    start = time.perf_counter()
+    resp = await get_async_http_client().get(
+        UNSPLASH_SEARCH_URL, params=_unsplash_params(query, count), headers=_unsplash_headers(), timeout=10
+    )
+    record_upstream("unsplash_search", resp.status_code, time.perf_counter() - start)
+    if resp.status_code != 200:
+        return None
+
+    photos = _slim_photos(resp.json())
+    await asyncio.to_thread(UNSPLASH_SEARCH_CACHE.put, cache_key, photos)
+    return photos
+
+
+async def _fetch_unsplash_photo_async(img_url: str) -> Image.Image | None:
+    data = UNSPLASH_PHOTO_CACHE.get(img_url)
+    if data is None:
+        start = time.perf_counter()
+        r = await get_async_http_client().get(img_url, timeout=10)
+        record_upstream("unsplash_photo", r.status_code, time.perf_counter() - start)
+        if r.status_code != 200:
+            return None
+        data = r.content
+        UNSPLASH_PHOTO_CACHE.put(img_url, data)
+    return await asyncio.to_thread(_decode_image, data)
+
+
+async def _fetch_unsplash_async(query: str, count: int = 3, display_width: int = 400) -> list[Image.Image]:
+    if not UNSPLASH_KEY:
+        return []
+    try:
+        photos = await _search_unsplash_async(query, count)
+        if not photos:
+            return []
+        urls = [u for u in (_unsplash_rendition(p["urls"], display_width) for p in photos) if u]
+        images = [img for img in await asyncio.gather(*map(_fetch_unsplash_photo_async, urls)) if img]
+        log.info(f"[Unsplash] ✅ {len(images)} photos for '{query}'")
+        return images
+    except Exception as e:
+        log.warning(f"[Unsplash] {e}")
+        return []
+
+
+async def _inspo_for_keyword_async(keyword: str, n_real: int, n_generated: int,
+                                   include_base64: bool, display_width: int) -> list[dict]:
+    results = []
+    real_imgs = await _fetch_unsplash_async(f"{keyword} fashion outfit", count=n_real,
+                                            display_width=display_width)
+    for img, b64 in zip(real_imgs, await asyncio.to_thread(_encode_all, real_imgs, include_base64)):
+        results.append({"source": "unsplash", "keyword": keyword, "image": img, "base64": b64})
+
+    n_gen = max(0, (n_real + n_generated) - len(real_imgs))
+    if n_gen > 0 and real_imgs and WARMER.is_cold(FAST_MODEL):
+        log.info(f"[Inspo] {FAST_MODEL} is cold — showing Unsplash only for '{keyword}'")
+        n_gen = 0
+    if n_gen > 0:
+        img = await _text2img_cached_async(_inspo_prompt(keyword))
+        if img:
+            results.append({"source": "generated", "keyword": keyword, "image": img,
+                            "base64": await asyncio.to_thread(_pil_to_base64, img) if include_base64 else None})
+    return results
+
+
+@profiled()
+async def generate_pinterest_inspo_async(
+    style_keywords: list[str],
+    n_real: int = 2,
+    n_generated: int = 1,
+    include_base64: bool = True,
+    display_width: int = 400,
+) -> list[dict]:
+    """Async generate_pinterest_inspo — keywords are fetched concurrently, results keep their order."""
+    per_keyword = await asyncio.gather(*(
+        _inspo_for_keyword_async(k, n_real, n_generated, include_base64, display_width)
+        for k in style_keywords
+    ))
+    return [item for items in per_keyword for item in items]
+
+
+@profiled()
+async def virtual_tryon_async(
+    user_photo: Image.Image,
+    outfit_description: str,
+    hair_makeup_description: str = "",
+    accessories: str = "",
+    use_ai_compositing: bool = True,
+    include_base64: bool = True,
+) -> dict:
+    """Async virtual_tryon — same fallback order and result shape."""
+    if not isinstance(user_photo, Image.Image):
+        return {"tryon_image": None, "base64": None, "success": False}
+
+    user_resized = await asyncio.to_thread(_resize_keep_aspect, user_photo, 512)
+    tryon_prompt, fallback_prompt = _tryon_prompts(outfit_description, hair_makeup_description, accessories)
+
+    tryon_result = None
+    method_used = "none"
+
+    if use_ai_compositing and HF_TOKEN and WARMER.is_cold(INPAINT_MODEL):
+        log.info(f"[TryOn] {INPAINT_MODEL} is cold — using blend fallback")
+    elif use_ai_compositing and HF_TOKEN:
+        tryon_result = await _hf_img2img_async(tryon_prompt, init_image=user_resized, strength=0.55)
+        if tryon_result:
+            method_used = "ai_img2img"
+
+    if tryon_result is None:
+        outfit_img = await _hf_text2img_async(fallback_prompt)
+        if outfit_img:
+            tryon_result = await asyncio.to_thread(_composite_overlay, user_resized, outfit_img)
+            method_used = "blend_fallback"
+
+    final_img = tryon_result
+    return {
+        "tryon_image": final_img,
+        "base64": await asyncio.to_thread(_pil_to_base64, final_img) if final_img and include_base64 else None,
+        "method": method_used,
+        "success": final_img is not None,
+    }
@@ -1,12 +1,40 @@
-import requests
+import time
+from functools import lru_cache
 
+from services.clients import get_async_http_client, get_http_session
+from services.metrics_service import record_upstream
+from services.profiling_service import profiled
+
+@lru_cache(maxsize=1)
+def get_countries():
+    # pycountry parses its ISO database on first iteration — do it once per process
+    import pycountry
+    return [c.name for c in pycountry.countries]
+
+STATES_URL = "https://countriesnow.space/api/v0.1/countries/states"
+
+@profiled()
 def get_states(country_name):
-    url = "https://countriesnow.space/api/v0.1/countries/states"
+    start = time.perf_counter()
     try:
-        response = requests.post(url, json={"country": country_name}, timeout=5)
+        response = get_http_session().post(STATES_URL, json={"country": country_name}, timeout=5)
+        record_upstream("countriesnow", response.status_code, time.perf_counter() - start)
         data = response.json()
         if not data["error"]:
             return [s["name"] for s in data["data"]["states"]]
     except:
-        pass
-    return []
\ No newline at end of file
+        record_upstream("countriesnow", "error", time.perf_counter() - start)
+    return []
+
+@profiled()
+async def get_states_async(country_name):
+    start = time.perf_counter()
+    try:
+        response = await get_async_http_client().post(STATES_URL, json={"country": country_name}, timeout=5)
+        record_upstream("countriesnow", response.status_code, time.perf_counter() - start)
+        data = response.json()
+        if not data["error"]:
+            return [s["name"] for s in data["data"]["states"]]
+    except Exception:
+        record_upstream("countriesnow", "error", time.perf_counter() - start)
+    return []
@@ -0,0 +1,356 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Side port for the scrape endpoint — unset means no server is started.
+METRICS_ENV_PORT = "METRICS_PORT"
+METRICS_ENV_HOST = "METRICS_HOST"
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# METRIC TYPES
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: dict | None = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs += [f'{n}="{_escape(v)}"' for n, v in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, one series per label combination."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (queue depth, in-flight jobs)."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with _bucket / _sum / _count series."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted((k, {"counts": list(v["counts"]), "sum": v["sum"]})
+                           for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═════════════════════════════════════════════════════════════════════════════
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list = []
+
+    def add_collector(self, collect) -> None:
+        """`collect()` runs before every scrape to refresh derived gauges."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collect in collectors:
+            try:
+                collect()
+            except Exception as e:
+                log.warning(f"[Metrics] Collector failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: tuple = (),
+              buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ── StyleAI metrics ───────────────────────────────────────────────────────────
+UPSTREAM_REQUESTS = counter(
+    "styleai_upstream_requests_total",
+    "Upstream API calls by service and status code.",
+    ("service", "status"),
+)
+UPSTREAM_LATENCY = histogram(
+    "styleai_upstream_request_seconds",
+    "Upstream API call latency in seconds.",
+    ("service",),
+)
+RETRY_SLEEPS = counter(
+    "styleai_retry_sleeps_total",
+    "Number of retry back-off sleeps by service.",
+    ("service",),
+)
+RETRY_SLEEP_SECONDS = counter(
+    "styleai_retry_sleep_seconds_total",
+    "Seconds spent sleeping in retry back-off by service.",
+    ("service",),
+)
+IMAGE_JOBS_IN_FLIGHT = gauge(
+    "styleai_image_jobs_in_flight",
+    "Image generation calls currently waiting on Hugging Face.",
+)
+IMAGE_JOBS_IN_FLIGHT.set(0)
+RERUNS = counter(
+    "styleai_reruns_total",
+    "Streamlit script reruns by wizard step.",
+    ("step",),
+)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# HELPERS
+# ═════════════════════════════════════════════════════════════════════════════
+
+def record_upstream(service: str, status, seconds: float) -> None:
+    """Count one upstream call and observe its latency."""
+    UPSTREAM_REQUESTS.inc(service=service, status=status)
+    UPSTREAM_LATENCY.observe(seconds, service=service)
+
+
+def error_status(error: Exception) -> str:
+    """Best-effort status label for an exception raised by an SDK call."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return str(code)
+    if "429" in str(error):
+        return "429"
+    return "error"
+
+
+def retry_sleep(service: str, seconds: float) -> None:
+    """time.sleep() that is visible in the retry metrics."""
+    RETRY_SLEEPS.inc(service=service)
+    RETRY_SLEEP_SECONDS.inc(seconds, service=service)
+    time.sleep(seconds)
+
+
+async def retry_sleep_async(service: str, seconds: float) -> None:
+    """asyncio.sleep() counterpart of retry_sleep — backs off without holding a thread."""
+    import asyncio
+    RETRY_SLEEPS.inc(service=service)
+    RETRY_SLEEP_SECONDS.inc(seconds, service=service)
+    await asyncio.sleep(seconds)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# HTTP EXPOSITION
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _make_handler():
+    # http.server drags in email/http.client — only import it when serving
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood the app log.
+            pass
+
+    return _MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int | None = None, host: str | None = None):
+    """
+    Start the /metrics endpoint on a daemon thread, once per process.
+    Safe to call on every Streamlit rerun. Returns None when no port is configured.
+    """
+    global _server
+    if _server is not None:
+        return _server
+
+    if port is None:
+        env_port = os.getenv(METRICS_ENV_PORT)
+        if not env_port:
+            return None
+        port = int(env_port)
+    host = host or os.getenv(METRICS_ENV_HOST, "0.0.0.0")
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import ThreadingHTTPServer
+        try:
+            server = ThreadingHTTPServer((host, port), _make_handler())
+        except OSError as e:
+            log.warning(f"[Metrics] Could not bind {host}:{port}: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        log.info(f"[Metrics] Serving on http://{host}:{port}/metrics")
+        _server = server
+        return _server
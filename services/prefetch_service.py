@@ -0,0 +1,145 @@
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from services.clients import load_env
+from services.gemini_service import get_style_recommendation
+from services.metrics_service import counter
+
+log = logging.getLogger(__name__)
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+PREFETCH_ENABLED = os.getenv("STYLEAI_PREFETCH", "1") not in ("0", "false", "off")
+DEBOUNCE_SECONDS = float(os.getenv("STYLEAI_PREFETCH_DEBOUNCE", "2.0"))
+PREFETCH_WORKERS = int(os.getenv("STYLEAI_PREFETCH_WORKERS", "8"))
+
+# Everything get_style_recommendation() puts in the prompt
+STYLE_INPUT_KEYS = (
+    "age", "gender", "skin_tone", "body_type", "hair",
+    "occasion", "style", "priority", "budget_min", "budget_max",
+    "country", "state", "colors",
+)
+
+# One process-wide pool so speculation can't spawn a thread per session
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="style-prefetch")
+
+PREFETCH_EVENTS = counter(
+    "styleai_prefetch_total",
+    "Speculative style recommendations by outcome.",
+    ("outcome",),
+)
+
+
+def style_inputs(state) -> dict:
+    """Plain-dict snapshot of the inputs that shape the recommendation."""
+    return {k: state.get(k) for k in STYLE_INPUT_KEYS}
+
+
+def _fingerprint(inputs: dict) -> str:
+    return json.dumps(inputs, sort_keys=True, default=str)
+
+
+class StylePrefetcher:
+    """
+    Per-session speculative runner for get_style_recommendation().
+
+    observe() is called on every Step 2 rerun; once the inputs have been stable
+    for DEBOUNCE_SECONDS the call starts in the background. take() hands the
+    result to Step 3 only if it was computed for exactly the current inputs —
+    speculations for older inputs are cancelled when possible, ignored otherwise.
+    """
+
+    def __init__(self, fetch=get_style_recommendation, debounce: float = DEBOUNCE_SECONDS):
+        self._fetch = fetch
+        self._debounce = debounce
+        self._lock = threading.Lock()
+        self._key: str | None = None
+        self._generation = 0
+        self._timer: threading.Timer | None = None
+        self._future: Future | None = None
+        # The speculation whose result has not been handed out yet — a hit counts once
+        self._unclaimed: Future | None = None
+
+    def observe(self, inputs: dict) -> None:
+        key = _fingerprint(inputs)
+        with self._lock:
+            if key == self._key:
+                return
+            self._invalidate()
+            self._key = key
+            if not PREFETCH_ENABLED:
+                return
+            self._timer = threading.Timer(self._debounce, self._start,
+                                          args=(self._generation, dict(inputs)))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _invalidate(self) -> None:
+        # Caller holds the lock
+        self._generation += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._future is not None and not self._future.done():
+            if not self._future.cancel():
+                PREFETCH_EVENTS.inc(outcome="stale")
+        self._future = None
+        self._unclaimed = None
+
+    def _start(self, generation: int, inputs: dict) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._timer = None
+            self._future = self._unclaimed = _executor.submit(self._fetch, inputs)
+        PREFETCH_EVENTS.inc(outcome="started")
+        log.info("[Prefetch] Speculative style recommendation started")
+
+    def put(self, inputs: dict, result: dict) -> None:
+        """Remember a result computed in the foreground for these inputs."""
+        future = Future()
+        future.set_result(result)
+        with self._lock:
+            self._invalidate()
+            self._key = _fingerprint(inputs)
+            self._future = future
+
+    def take(self, inputs: dict) -> dict | None:
+        """
+        Result for `inputs` if a speculation (or an earlier put) matches them,
+        waiting for an in-flight call. None means the caller should fetch itself.
+        """
+        key = _fingerprint(inputs)
+        with self._lock:
+            if key != self._key or self._future is None:
+                # Debounce still pending — the caller is about to fetch anyway
+                self._invalidate()
+                self._key = key
+                PREFETCH_EVENTS.inc(outcome="miss")
+                return None
+            future = self._future
+
+        try:
+            result = future.result()
+        except Exception as e:
+            log.warning(f"[Prefetch] Speculative call failed: {e}")
+            with self._lock:
+                if self._future is future:
+                    self._future = None
+                if self._unclaimed is future:
+                    self._unclaimed = None
+            PREFETCH_EVENTS.inc(outcome="miss")
+            return None
+
+        # Later Step 3 reruns and foreground put() results are reuse, not prefetch hits
+        with self._lock:
+            first_take = self._unclaimed is future
+            if first_take:
+                self._unclaimed = None
+        if first_take:
+            PREFETCH_EVENTS.inc(outcome="hit")
+        return result
@@ -0,0 +1,274 @@
+"""
+Opt-in profiling for Streamlit reruns and service calls.
+
+    STYLEAI_PROFILE=rerun   cProfile every rerun of app.py (run via profile_app.py)
+    STYLEAI_PROFILE=calls   cProfile every decorated service call
+    STYLEAI_PROFILE=all     both (calls inside a profiled rerun are only timed)
+
+Profiles land in STYLEAI_PROFILE_DIR (default ./profiles). Summarize with:
+
+    python -m services.profiling_service profiles/ --top 25
+"""
+import os
+import io
+import sys
+import json
+import time
+import glob
+import logging
+import cProfile
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+PROFILE_ENV      = "STYLEAI_PROFILE"
+PROFILE_DIR_ENV  = "STYLEAI_PROFILE_DIR"
+PROFILE_KEEP_ENV = "STYLEAI_PROFILE_KEEP"
+
+DEFAULT_DIR  = "profiles"
+DEFAULT_KEEP = 500
+TIMINGS_FILE = "calls.jsonl"
+
+# Only one cProfile may run at a time: before 3.12 the hook is per-thread and a nested
+# profiler clobbers the outer one; from 3.12 it is process-wide (sys.monitoring) and a
+# second enable() anywhere raises ValueError. _local marks threads already inside one.
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CONFIG HELPERS
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _mode() -> str:
+    return os.getenv(PROFILE_ENV, "").strip().lower()
+
+
+def rerun_profiling_enabled() -> bool:
+    return _mode() in ("rerun", "all", "1", "true")
+
+
+def call_profiling_enabled() -> bool:
+    return _mode() in ("calls", "all")
+
+
+def profile_dir() -> str:
+    path = os.getenv(PROFILE_DIR_ENV, DEFAULT_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _profile_path(kind: str, name: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    millis = int((time.time() % 1) * 1000)
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))
+    return os.path.join(profile_dir(), f"{kind}-{safe}-{stamp}-{millis:03d}-{os.getpid()}.prof")
+
+
+def _prune(directory: str) -> None:
+    """Keep only the newest STYLEAI_PROFILE_KEEP profiles."""
+    keep = int(os.getenv(PROFILE_KEEP_ENV, DEFAULT_KEEP))
+    files = sorted(glob.glob(os.path.join(directory, "*.prof")), key=os.path.getmtime)
+    for old in files[:-keep] if keep > 0 else []:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def _dump(profiler: cProfile.Profile, path: str) -> None:
+    with _write_lock:
+        profiler.dump_stats(path)
+        _prune(os.path.dirname(path))
+
+
+def _enable(profiler: cProfile.Profile) -> cProfile.Profile | None:
+    """Start `profiler`, or return None if another profiler already holds the hook."""
+    try:
+        profiler.enable()
+    except ValueError as e:
+        log.debug(f"[Profile] Timing only: {e}")
+        return None
+    return profiler
+
+
+def _record_timing(entry: dict) -> None:
+    path = os.path.join(profile_dir(), TIMINGS_FILE)
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# HOOKS
+# ═════════════════════════════════════════════════════════════════════════════
+
+@contextmanager
+def profile_rerun(label: str = "rerun"):
+    """
+    Wrap one Streamlit rerun. No-op unless STYLEAI_PROFILE enables reruns.
+    st.rerun() / st.stop() raise control-flow exceptions, so the profile is
+    written in a finally block and the exception is re-raised untouched.
+    """
+    if not rerun_profiling_enabled() or getattr(_local, "active", False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    _local.active = True
+    start = time.perf_counter()
+    try:
+        # Another session's rerun may hold the process-wide hook — then time only
+        profiler = _enable(profiler)
+        yield
+    finally:
+        _local.active = False
+        elapsed = time.perf_counter() - start
+        if profiler is None:
+            log.info(f"[Profile] rerun {label} {elapsed:.3f}s (timing only, another profiler is active)")
+        else:
+            profiler.disable()
+            path = _profile_path("rerun", label)
+            try:
+                _dump(profiler, path)
+                log.info(f"[Profile] rerun {label} {elapsed:.3f}s → {path}")
+            except OSError as e:
+                log.warning(f"[Profile] Could not write {path}: {e}")
+
+
+def profiled(name: str | None = None):
+    """
+    Decorator for service entry points. With call profiling on, each call is
+    cProfiled to its own file; calls already inside a profiled rerun are only
+    timed, since their frames are captured by the rerun profile.
+    """
+    def decorator(func):
+        label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if inspect.iscoroutinefunction(func):
+            # Coroutines interleave on one thread, so a cProfile would also catch
+            # every other task's frames — record wall time only
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not call_profiling_enabled():
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    try:
+                        _record_timing({"call": label, "seconds": round(elapsed, 6),
+                                        "ts": time.time(), "nested": False, "async": True})
+                    except OSError as e:
+                        log.warning(f"[Profile] Could not record {label}: {e}")
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not call_profiling_enabled():
+                return func(*args, **kwargs)
+
+            nested = getattr(_local, "active", False)
+            profiler = None if nested else cProfile.Profile()
+            start = time.perf_counter()
+            if not nested:
+                _local.active = True
+            try:
+                if profiler:
+                    profiler = _enable(profiler)
+                return func(*args, **kwargs)
+            finally:
+                if not nested:
+                    _local.active = False
+                elapsed = time.perf_counter() - start
+                entry = {"call": label, "seconds": round(elapsed, 6), "ts": time.time(), "nested": nested}
+                try:
+                    if profiler:
+                        profiler.disable()
+                        entry["profile"] = _profile_path("call", label)
+                        _dump(profiler, entry["profile"])
+                    _record_timing(entry)
+                except OSError as e:
+                    log.warning(f"[Profile] Could not record {label}: {e}")
+
+        return wrapper
+    return decorator
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SUMMARIZER
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _expand(paths: list[str]) -> list[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.prof"))))
+        else:
+            files.extend(sorted(glob.glob(path)))
+    return files
+
+
+def summarize(paths: list[str] | str, top: int = 20, sort: str = "cumulative") -> str:
+    """Merge one or more .prof files and return the top hot spots as text."""
+    import pstats
+
+    if isinstance(paths, str):
+        paths = [paths]
+    files = _expand(paths)
+    if not files:
+        return "No profiles found.\n"
+
+    out = io.StringIO()
+    stats = pstats.Stats(files[0], stream=out)
+    for path in files[1:]:
+        stats.add(path)
+    out.write(f"{len(files)} profile(s), {stats.total_tt:.3f}s total\n")
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+def summarize_calls(directory: str | None = None) -> str:
+    """Per-call count / mean / max from the calls.jsonl timing log."""
+    path = os.path.join(directory or profile_dir(), TIMINGS_FILE)
+    if not os.path.exists(path):
+        return "No call timings recorded.\n"
+
+    totals: dict[str, list[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            totals.setdefault(entry["call"], []).append(entry["seconds"])
+
+    lines = [f"{'call':<45}{'count':>7}{'mean s':>10}{'max s':>10}"]
+    for call, secs in sorted(totals.items(), key=lambda kv: -sum(kv[1])):
+        lines.append(f"{call:<45}{len(secs):>7}{sum(secs) / len(secs):>10.3f}{max(secs):>10.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize StyleAI profiles.")
+    parser.add_argument("paths", nargs="*", help="profile files, globs or directories")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", default="cumulative",
+                        help="pstats sort key (cumulative, tottime, calls, …)")
+    parser.add_argument("--calls", action="store_true", help="show service-call timings instead")
+    args = parser.parse_args(argv)
+
+    if args.calls:
+        sys.stdout.write(summarize_calls(args.paths[0] if args.paths else None))
+    else:
+        sys.stdout.write(summarize(args.paths or [profile_dir()], top=args.top, sort=args.sort))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+
+from services.clients import load_env
+from services.metrics_service import counter
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Content-word Jaccard at or above this collapses two prompts into one generation
+DEDUP_THRESHOLD = float(os.getenv("PROMPT_DEDUP_THRESHOLD", "0.85"))
+
+_SEPARATORS = re.compile(r"[;|\n]+")
+_JUNK       = re.compile(r"[^\w\s,'&+-]")
+_SPACE      = re.compile(r"\s+")
+_WORD       = re.compile(r"\w+")
+
+# Words that never change the picture
+_FILLER = frozenset("a an the and of".split())
+# British spellings fold to one form, so both share a generation and a cache key
+_SPELLING = {
+    "jewellery": "jewelry", "colour": "color", "colours": "colors", "coloured": "colored",
+    "grey": "gray", "centre": "center", "favourite": "favorite", "pyjamas": "pajamas",
+}
+_SPELLING_WORD = re.compile(r"\b(" + "|".join(_SPELLING) + r")\b")
+
+PROMPTS_COLLAPSED = counter(
+    "styleai_prompts_collapsed_total",
+    "Image prompts served by another near-identical prompt in the same request.",
+)
+
+
+def canonicalize(prompt: str) -> str:
+    """
+    Canonical form of a prompt: NFKC, lower case, one space between words,
+    comma-separated fragments with repeats removed (first occurrence wins).
+    """
+    text = unicodedata.normalize("NFKC", prompt or "").lower()
+    text = _SPELLING_WORD.sub(lambda m: _SPELLING[m.group(1)], text)
+    text = _SEPARATORS.sub(",", text)
+    text = _JUNK.sub(" ", text)
+    fragments = []
+    for fragment in text.split(","):
+        fragment = _SPACE.sub(" ", fragment).strip(" -")
+        if fragment and fragment not in fragments:
+            fragments.append(fragment)
+    return ", ".join(fragments)
+
+
+def _content_words(canonical: str) -> tuple[str, ...]:
+    words = []
+    for word in _WORD.findall(canonical):
+        if word in _FILLER:
+            continue
+        # Cheap plural folding: "heels" → "heel"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return tuple(words)
+
+
+def _near_duplicate(a: tuple[str, ...], b: tuple[str, ...], threshold: float) -> bool:
+    if a == b:
+        return True
+    set_a, set_b = set(a), set(b)
+    # Words may be added or dropped, never replaced ("pastel pink" ≠ "pastel blue")
+    if set_a - set_b and set_b - set_a:
+        return False
+    common = set_a & set_b
+    if len(common) / len(set_a | set_b) < threshold:
+        return False
+    # ...and shared words keep their order ("black blazer, white shirt" ≠ "white blazer, black shirt")
+    return [w for w in a if w in common] == [w for w in b if w in common]
+
+
+def dedupe_prompts(prompts: list[str], threshold: float = DEDUP_THRESHOLD) -> tuple[list[str], list[int]]:
+    """
+    Canonicalize `prompts` and collapse near-duplicates.
+    Returns (unique canonical prompts, index into them for every input slot).
+    """
+    unique: list[str] = []
+    unique_words: list[tuple[str, ...]] = []
+    slots: list[int] = []
+    for prompt in prompts:
+        canonical = canonicalize(prompt)
+        words = _content_words(canonical)
+        match = next(
+            (i for i, other in enumerate(unique_words) if _near_duplicate(words, other, threshold)),
+            None,
+        )
+        if match is None:
+            unique.append(canonical)
+            unique_words.append(words)
+            match = len(unique) - 1
+        else:
+            PROMPTS_COLLAPSED.inc()
+        slots.append(match)
+    return unique, slots
+
+
+def prompt_cache_key(canonical: str, model: str, params: dict | None = None) -> str:
+    """Stable across processes and users: canonical prompt + model + generation params."""
+    payload = json.dumps([canonical, model, params or {}], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,200 @@
+import os
+import re
+import time
+import zlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from services.clients import load_env
+from services.metrics_service import counter
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+CACHE_TTL         = float(os.getenv("CHAT_CACHE_TTL", str(6 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000"))
+CACHE_THRESHOLD   = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.7"))   # estimated Jaccard
+
+SHINGLE   = 3     # character n-gram size
+NUM_PERM  = 64    # MinHash signature length
+BANDS     = 16    # LSH bands × rows = NUM_PERM; 16×4 catches pairs above ~0.5 Jaccard
+ROWS      = NUM_PERM // BANDS
+_PRIME    = 4294967311   # smallest prime > 2**32; a*x stays below 2**64 in uint64
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+# Function words a rephrasing may add, drop or swap; everything else must match exactly.
+# Negations and prepositions that place things (with/without, over/under, in/on)
+# change the answer, so they are content words.
+STOPWORDS = frozenset("""
+a an the and or but of to at for from by about
+what which who whom whose when where why how is are was were be been being am
+do does did can could should would will shall may might must
+go goes going look looks looking wear wearing worn pair paired pairs match matches
+best good better well nice some any much many more most very really just also
+please tell give suggest recommend show idea ideas tip tips
+""".split())
+
+CACHE_LOOKUPS = counter(
+    "styleai_chat_cache_total",
+    "Chat response cache lookups by result.",
+    ("result",),
+)
+
+
+def normalize(text: str) -> str:
+    """Case-, Unicode-width-, punctuation- and whitespace-insensitive form of `text`."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _PUNCT.sub(" ", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def content_words(normalized: str) -> frozenset:
+    """Words that carry the question's meaning — garments, colours, occasions."""
+    words = set()
+    for word in normalized.split():
+        if word in STOPWORDS:
+            continue
+        # Fold plain plurals so "shoe"/"shoes" still match
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return frozenset(words)
+
+
+class _MinHasher:
+    # numpy is imported on first use so the chat path stays cheap to import
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 7):
+        import numpy as np
+        self.np = np
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2**32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2**32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized: str):
+        np = self.np
+        padded = f" {normalized} "
+        grams = {padded[i:i + SHINGLE] for i in range(max(1, len(padded) - SHINGLE + 1))}
+        x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        # (a·x + b) mod p for every permutation × shingle, min over shingles
+        hashed = (self.a[:, None] * x[None, :] + self.b[:, None]) % np.uint64(_PRIME)
+        return hashed.min(axis=1)
+
+
+class SemanticCache:
+    """
+    Process-wide approximate-match cache for chat answers.
+
+    Exact hits are looked up on the normalized text; otherwise MinHash
+    signatures over character n-grams are bucketed with LSH and the best
+    candidate above `threshold` estimated Jaccard similarity wins — but only
+    if it has exactly the same content words. Character n-grams can't tell
+    "saree" from "kurta" or "black" from "navy", so similarity alone only
+    finds candidates; the content-word check decides. Entries
+    expire after `ttl` seconds and the least recently used are evicted past
+    `max_entries`. Namespaces keep answers for different audiences apart.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES,
+                 threshold: float = CACHE_THRESHOLD):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._buckets: dict[tuple, set] = {}
+        self._hasher: _MinHasher | None = None
+
+    def _signature(self, normalized: str):
+        if self._hasher is None:
+            self._hasher = _MinHasher()
+        return self._hasher.signature(normalized)
+
+    @staticmethod
+    def _bands(namespace: str, signature) -> list[tuple]:
+        return [(namespace, i, signature[i * ROWS:(i + 1) * ROWS].tobytes()) for i in range(BANDS)]
+
+    def _drop(self, key: tuple) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in self._bands(key[0], entry["signature"]):
+            members = self._buckets.get(band)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[band]
+
+    def get(self, text: str, namespace: str = "") -> str | None:
+        normalized = normalize(text)
+        if not normalized:
+            return None
+        key = (namespace, normalized)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] > now:
+                self._entries.move_to_end(key)
+                CACHE_LOOKUPS.inc(result="hit_exact")
+                return entry["value"]
+
+        signature = self._signature(normalized)
+        words = content_words(normalized)
+        with self._lock:
+            candidates = set()
+            for band in self._bands(namespace, signature):
+                candidates |= self._buckets.get(band, set())
+
+            best_key, best_score = None, self.threshold
+            for cand in candidates:
+                entry = self._entries.get(cand)
+                if entry is None:
+                    continue
+                if entry["expires"] <= now:
+                    self._drop(cand)
+                    continue
+                if entry["words"] != words:
+                    continue
+                score = float((entry["signature"] == signature).mean())
+                if score >= best_score:
+                    best_key, best_score = cand, score
+
+            if best_key is None:
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+            self._entries.move_to_end(best_key)
+            CACHE_LOOKUPS.inc(result="hit_similar")
+            return self._entries[best_key]["value"]
+
+    def put(self, text: str, value: str, namespace: str = "") -> None:
+        normalized = normalize(text)
+        if not normalized:
+            return
+        key = (namespace, normalized)
+        signature = self._signature(normalized)
+
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = {"value": value, "signature": signature,
+                                  "words": content_words(normalized),
+                                  "expires": time.time() + self.ttl}
+            for band in self._bands(namespace, signature):
+                self._buckets.setdefault(band, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every session in this process
+CHAT_CACHE = SemanticCache()
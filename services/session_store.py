@@ -0,0 +1,389 @@
+import os
+import re
+import time
+import atexit
+import shutil
+import socket
+import hashlib
+import logging
+import secrets
+import tempfile
+import threading
+import itertools
+from io import BytesIO
+from collections import OrderedDict
+
+from services.clients import load_env
+from services.metrics_service import REGISTRY, gauge
+
+log = logging.getLogger(__name__)
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(4 * 1024 * 1024)))
+PROCESS_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+SPILL_DIR         = os.getenv("SESSION_SPILL_DIR") or os.path.join(tempfile.gettempdir(), "styleai-sessions")
+SPILL_MAX_BYTES   = int(os.getenv("SESSION_SPILL_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+IDLE_TTL          = float(os.getenv("SESSION_IDLE_TTL", "3600"))   # drop sessions unseen this long
+EXPIRE_EVERY      = 60   # seconds between idle sweeps triggered by put()
+
+# Each process spills into <spill_dir>/<host>-<pid>-<token>, removed at exit
+_HOST        = re.sub(r"[^\w.]", "_", socket.gethostname()) or "localhost"
+_SPILL_OWNER = re.compile(r"^(?P<host>.+)-(?P<pid>\d+)-[0-9a-f]{8}$")
+
+# WebP at q85 is ~10× smaller than the PNG the image services produce
+IMAGE_FORMAT  = "WEBP"
+IMAGE_QUALITY = 85
+
+STORE_BYTES = gauge(
+    "styleai_session_store_bytes",
+    "Bytes held by the session blob store, by tier.",
+    ("tier",),
+)
+STORE_SESSIONS = gauge(
+    "styleai_session_store_sessions",
+    "Sessions with at least one blob in the session store.",
+)
+SESSION_BYTES = gauge(
+    "styleai_session_store_session_bytes",
+    "In-memory bytes per session: mean and max across live sessions.",
+    ("stat",),
+)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True   # os.kill(pid, 0) would terminate it on Windows; never sweep there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True   # exists, owned by someone else
+    return True
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def encode_image(img, fmt: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
+
+
+class SessionStore:
+    """
+    Process-wide blob store for per-session images.
+
+    Blobs are kept as encoded bytes in one LRU across all sessions. When a
+    session exceeds `session_max` or the process exceeds `process_max`, the
+    least recently used blobs are spilled to a directory of this process's
+    own under `spill_dir`; get() transparently reads them back. The disk tier
+    is itself bounded, and blobs that fall off it are gone — callers treat a
+    None from get() as "regenerate".
+
+    Disk reads and writes happen outside the store lock, so one slow spill
+    never stalls every other session's get().
+    """
+
+    def __init__(self, session_max: int = SESSION_MAX_BYTES, process_max: int = PROCESS_MAX_BYTES,
+                 spill_dir: str = SPILL_DIR, spill_max: int = SPILL_MAX_BYTES, idle_ttl: float = IDLE_TTL):
+        self.session_max = session_max
+        self.process_max = process_max
+        self.spill_root = spill_dir
+        # Replicas may share spill_dir; each process only ever touches its own directory
+        self.spill_dir = os.path.join(spill_dir, f"{_HOST}-{os.getpid()}-{secrets.token_hex(4)}")
+        self.spill_max = spill_max
+        self.idle_ttl = idle_ttl
+        self._next_expiry = time.time() + EXPIRE_EVERY
+        self._lock = threading.Lock()
+        self._mem: OrderedDict[tuple, bytes] = OrderedDict()
+        self._disk: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self._spilling: dict[tuple, tuple[str, bytes]] = {}   # written to disk right now
+        # Disk work queued under the lock, done once it is released
+        self._writes: list[tuple] = []
+        self._unlinks: list[str] = []
+        self._spill_seq = itertools.count()
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._session_mem: dict[str, int] = {}
+        self._session_disk: dict[str, int] = {}
+        self._last_seen: dict[str, float] = {}
+        self._sweep_dead_owners()
+        atexit.register(self._remove_spill_dir)
+
+    def _sweep_dead_owners(self) -> None:
+        # Spill directories left behind by crashed processes on this host
+        try:
+            names = os.listdir(self.spill_root)
+        except OSError:
+            return
+        removed = 0
+        for name in names:
+            owner = _SPILL_OWNER.match(name)
+            if not owner or owner["host"] != _HOST or _pid_alive(int(owner["pid"])):
+                continue
+            shutil.rmtree(os.path.join(self.spill_root, name), ignore_errors=True)
+            removed += 1
+        if removed:
+            log.info(f"[SessionStore] Removed {removed} spill directories of dead processes from {self.spill_root}")
+
+    def _remove_spill_dir(self) -> None:
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    # ── internals (caller holds the lock) ─────────────────────────────────
+    def _spill_path(self, key: tuple) -> str:
+        # A fresh name per write, so a late unlink of an old copy never hits a new one
+        digest = hashlib.sha1(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.{next(self._spill_seq)}")
+
+    def _add_mem(self, key: tuple, data: bytes) -> None:
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        self._session_mem[key[0]] = self._session_mem.get(key[0], 0) + len(data)
+
+    def _remove_mem(self, key: tuple) -> bytes | None:
+        data = self._mem.pop(key, None)
+        if data is not None:
+            self._mem_bytes -= len(data)
+            self._session_mem[key[0]] -= len(data)
+        return data
+
+    def _remove_disk(self, key: tuple) -> None:
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return
+        path, size = entry
+        self._disk_bytes -= size
+        self._session_disk[key[0]] -= size
+        self._unlinks.append(path)
+
+    def _remove(self, key: tuple) -> None:
+        self._remove_mem(key)
+        self._remove_disk(key)
+        # An in-flight spill of the old value is discarded when its write finishes
+        self._spilling.pop(key, None)
+
+    def _forget_empty(self, session_id: str) -> None:
+        if (not self._session_mem.get(session_id) and not self._session_disk.get(session_id)
+                and not any(k[0] == session_id for k in self._spilling)):
+            self._session_mem.pop(session_id, None)
+            self._session_disk.pop(session_id, None)
+            self._last_seen.pop(session_id, None)
+
+    def _spill(self, key: tuple) -> None:
+        data = self._remove_mem(key)
+        if data is None:
+            return
+        pending = (self._spill_path(key), data)
+        self._spilling[key] = pending
+        self._writes.append((key, pending))
+
+    def _enforce(self, session_id: str) -> None:
+        if self._session_mem.get(session_id, 0) > self.session_max:
+            for key in [k for k in self._mem if k[0] == session_id]:
+                if self._session_mem[session_id] <= self.session_max:
+                    break
+                self._spill(key)
+        while self._mem_bytes > self.process_max and self._mem:
+            self._spill(next(iter(self._mem)))
+
+    def _drop_session(self, session_id: str) -> None:
+        for key in [k for k in (*self._mem, *self._disk, *self._spilling) if k[0] == session_id]:
+            self._remove(key)
+        self._forget_empty(session_id)
+
+    def _expire_idle(self, now: float) -> int:
+        self._next_expiry = now + EXPIRE_EVERY
+        if self.idle_ttl <= 0:
+            return 0
+        idle = [sid for sid, seen in self._last_seen.items() if now - seen > self.idle_ttl]
+        for sid in idle:
+            self._drop_session(sid)
+            # A session with only failed spills has no blobs left to trigger _forget_empty
+            self._last_seen.pop(sid, None)
+        return len(idle)
+
+    def _publish(self) -> None:
+        STORE_BYTES.set(self._mem_bytes, tier="memory")
+        STORE_BYTES.set(self._disk_bytes, tier="disk")
+        STORE_SESSIONS.set(len(self._last_seen))
+
+    def _take_io(self) -> tuple[list, list]:
+        io = (self._writes, self._unlinks)
+        self._writes, self._unlinks = [], []
+        return io
+
+    # ── disk I/O (caller does not hold the lock) ──────────────────────────
+    def _run_io(self, io: tuple[list, list]) -> None:
+        writes, unlinks = io
+        for path in unlinks:
+            _unlink(path)
+        for key, pending in writes:
+            self._write_spill(key, pending)
+
+    def _write_spill(self, key: tuple, pending: tuple[str, bytes]) -> None:
+        path, data = pending
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            written = True
+        except OSError as e:
+            log.warning(f"[SessionStore] Spill failed, dropping {key[1]}: {e}")
+            written = False
+        with self._lock:
+            if self._spilling.get(key) is not pending:
+                # Replaced or deleted while it was being written
+                self._unlinks.append(path)
+            else:
+                del self._spilling[key]
+                if written:
+                    self._disk[key] = (path, len(data))
+                    self._disk_bytes += len(data)
+                    self._session_disk[key[0]] = self._session_disk.get(key[0], 0) + len(data)
+                    while self._disk_bytes > self.spill_max and self._disk:
+                        oldest = next(iter(self._disk))
+                        self._remove_disk(oldest)
+                        self._forget_empty(oldest[0])
+                self._forget_empty(key[0])
+                self._publish()
+            io = self._take_io()
+        self._run_io(io)
+
+    # ── public API ────────────────────────────────────────────────────────
+    def put(self, session_id: str, name: str, data: bytes) -> None:
+        key = (session_id, name)
+        with self._lock:
+            self._remove(key)
+            self._add_mem(key, data)
+            now = time.time()
+            self._last_seen[session_id] = now
+            self._enforce(session_id)
+            if now >= self._next_expiry:
+                self._expire_idle(now)
+            self._publish()
+            io = self._take_io()
+        self._run_io(io)
+
+    def put_image(self, session_id: str, name: str, img) -> int:
+        """Encode a PIL image once (WebP) and store it. Returns the stored size."""
+        data = encode_image(img)
+        self.put(session_id, name, data)
+        return len(data)
+
+    def get(self, session_id: str, name: str) -> bytes | None:
+        key = (session_id, name)
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                return data
+            if key in self._spilling:
+                return self._spilling[key][1]
+            entry = self._disk.get(key)
+            if entry is None:
+                self._forget_empty(session_id)
+                return None
+        try:
+            with open(entry[0], "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        with self._lock:
+            if self._disk.get(key) is not entry:
+                # Promoted, replaced or deleted while we were reading — look again
+                retry = True
+            else:
+                retry = False
+                # Promote back to memory — it is being viewed again
+                self._remove_disk(key)
+                if data is not None:
+                    self._add_mem(key, data)
+                    self._enforce(session_id)
+                self._forget_empty(session_id)
+                self._publish()
+            io = self._take_io()
+        self._run_io(io)
+        return self.get(session_id, name) if retry else data
+
+    def delete(self, session_id: str, name: str) -> None:
+        with self._lock:
+            self._remove((session_id, name))
+            self._forget_empty(session_id)
+            self._publish()
+            io = self._take_io()
+        self._run_io(io)
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            self._drop_session(session_id)
+            self._publish()
+            io = self._take_io()
+        self._run_io(io)
+
+    def expire_idle(self) -> int:
+        """Drop every session not seen for `idle_ttl` seconds. Returns how many went."""
+        with self._lock:
+            expired = self._expire_idle(time.time())
+            self._publish()
+            io = self._take_io()
+        self._run_io(io)
+        if expired:
+            log.info(f"[SessionStore] Expired {expired} idle sessions")
+        return expired
+
+    def usage(self, session_id: str) -> dict:
+        with self._lock:
+            return {
+                "memory_bytes": self._session_mem.get(session_id, 0),
+                "disk_bytes": self._session_disk.get(session_id, 0),
+                "items": sum(1 for k in self._mem if k[0] == session_id)
+                         + sum(1 for k in self._disk if k[0] == session_id),
+            }
+
+    def report(self, top: int = 20) -> dict:
+        """Totals plus the heaviest sessions — for capacity planning."""
+        with self._lock:
+            sessions = [
+                {"session": sid, "memory_bytes": self._session_mem.get(sid, 0),
+                 "disk_bytes": self._session_disk.get(sid, 0), "last_seen": seen}
+                for sid, seen in self._last_seen.items()
+            ]
+            totals = {
+                "sessions": len(self._last_seen),
+                "memory_bytes": self._mem_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_budget": self.process_max,
+                "session_budget": self.session_max,
+            }
+        sessions.sort(key=lambda s: -s["memory_bytes"])
+        n = len(sessions)
+        totals["avg_memory_per_session"] = totals["memory_bytes"] // n if n else 0
+        return {"totals": totals, "sessions": sessions[:top]}
+
+
+# One store per process, shared by every Streamlit session
+SESSION_STORE = SessionStore()
+
+
+def _collect_report() -> None:
+    # Every scrape also sweeps idle sessions, so the gauges count live ones
+    SESSION_STORE.expire_idle()
+    report = SESSION_STORE.report(top=1)
+    totals = report["totals"]
+    STORE_BYTES.set(totals["memory_bytes"], tier="memory")
+    STORE_BYTES.set(totals["disk_bytes"], tier="disk")
+    STORE_SESSIONS.set(totals["sessions"])
+    SESSION_BYTES.set(totals["avg_memory_per_session"], stat="mean")
+    SESSION_BYTES.set(report["sessions"][0]["memory_bytes"] if report["sessions"] else 0, stat="max")
+
+
+REGISTRY.add_collector(_collect_report)
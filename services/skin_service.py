@@ -1,8 +1,12 @@
-import cv2
-import numpy as np
+from services.profiling_service import profiled
 
+@profiled()
 def detect_skin_tone(image):
-    img = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    # OpenCV + NumPy only load once someone actually uploads a photo
+    import cv2
+    import numpy as np
+
+    img = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2HSV)
 
     lower = np.array([0, 30, 60])
     upper = np.array([20, 150, 255])
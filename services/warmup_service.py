@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+import threading
+
+from services.clients import load_env
+from services.metrics_service import gauge, record_upstream
+
+log = logging.getLogger(__name__)
+
+load_env()
+
+# ── Config ────────────────────────────────────────────────────────────────────
+WARMUP_ENABLED     = os.getenv("HF_WARMUP", "1") not in ("0", "false", "off")
+KEEPALIVE_INTERVAL = float(os.getenv("HF_KEEPALIVE_INTERVAL", "300"))   # 0 = startup ping only
+COLD_RETRY_INTERVAL = 30   # re-ping a loading model sooner than the keep-alive
+# A 503 is only trusted this long — without a fresh one the state falls back to unknown,
+# so a missed re-warm (warm-up off, odd ping status) can't disable a feature for good
+COLD_TTL = 4 * COLD_RETRY_INTERVAL
+
+WARM  = "warm"
+COLD  = "cold"
+UNKNOWN = "unknown"
+
+MODEL_WARM = gauge(
+    "styleai_hf_model_warm",
+    "1 if the Hugging Face model answered its last ping, 0 if it was loading.",
+    ("model",),
+)
+
+
+class ModelWarmer:
+    """
+    Background scheduler that keeps Hugging Face endpoints loaded.
+
+    `ping(model)` must perform one cheap inference call and return the HTTP
+    status code (or None on a network error). Every model is pinged at start
+    and then every `interval` seconds; real traffic reports its status codes
+    via note_status(), and a 503 there triggers an immediate re-warm.
+    """
+
+    def __init__(self, models: list[str], ping, interval: float = KEEPALIVE_INTERVAL):
+        self.models = list(models)
+        self._ping = ping
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = False
+        self._state = {m: {"state": UNKNOWN, "status": None, "checked_at": None,
+                           "last_warm": None, "last_cold": None, "latency": None}
+                       for m in self.models}
+
+    # ── lifecycle ─────────────────────────────────────────────────────────
+    def start(self) -> None:
+        """Start the scheduler once per process; later calls (every rerun) are no-ops."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._spawn()
+        log.info(f"[Warmup] Keeping {', '.join(self.models)} warm every {self.interval:.0f}s")
+
+    def kick(self) -> None:
+        """Re-ping now instead of waiting for the next interval."""
+        self._wake.set()
+        with self._lock:
+            # Startup-only mode exits once everything is warm; come back for the re-warm
+            if self._started and not self._thread.is_alive():
+                self._spawn()
+
+    def _spawn(self) -> None:
+        # Caller holds the lock
+        self._thread = threading.Thread(target=self._run, name="hf-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            for model in self.models:
+                self._check(model)
+            any_cold = any(self.is_cold(m) for m in self.models)
+            if self.interval <= 0 and not any_cold:
+                return
+            wait = COLD_RETRY_INTERVAL if any_cold else self.interval
+            if self.interval > 0:
+                wait = min(wait, self.interval)
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def _check(self, model: str) -> None:
+        start = time.perf_counter()
+        try:
+            status = self._ping(model)
+        except Exception as e:
+            log.warning(f"[Warmup] {model}: {e}")
+            status = None
+        latency = time.perf_counter() - start
+        record_upstream("hf_warmup", status or "error", latency)
+        self.note_status(model, status, latency=latency, from_ping=True)
+
+    # ── state ─────────────────────────────────────────────────────────────
+    def note_status(self, model: str, status, latency: float | None = None,
+                    from_ping: bool = False) -> None:
+        """Record what a ping or a real request learned about `model`."""
+        if model not in self._state:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._state[model]
+            entry["status"] = status
+            entry["checked_at"] = now
+            if latency is not None:
+                entry["latency"] = round(latency, 3)
+            if status == 200:
+                entry["state"] = WARM
+                entry["last_warm"] = now
+            elif status == 503:
+                entry["state"] = COLD
+                entry["last_cold"] = now
+            elif from_ping:
+                # 404 / 400 / network error: the ping says nothing about loading
+                entry["state"] = UNKNOWN
+        if status == 200:
+            MODEL_WARM.set(1, model=model)
+        elif status == 503:
+            MODEL_WARM.set(0, model=model)
+            if not from_ping:
+                log.info(f"[Warmup] {model} went cold — re-warming in background")
+                self.kick()
+
+    def state(self, model: str) -> str:
+        entry = self._state.get(model)
+        if entry is None:
+            return UNKNOWN
+        # A warm model that has not been seen for two intervals may have been unloaded
+        if (entry["state"] == WARM and self.interval > 0
+                and time.time() - entry["last_warm"] > 2 * self.interval):
+            return UNKNOWN
+        if entry["state"] == COLD and time.time() - entry["last_cold"] > COLD_TTL:
+            return UNKNOWN
+        return entry["state"]
+
+    def is_warm(self, model: str) -> bool:
+        return self.state(model) == WARM
+
+    def is_cold(self, model: str) -> bool:
+        """True only when the model is known to be loading — unknown is not cold."""
+        return self.state(model) == COLD
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {m: dict(v, state=self.state(m)) for m, v in self._state.items()}
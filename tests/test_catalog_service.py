@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.catalog_service import CatalogIndex, compact, ingest
+
+
+def write_feed(tmp_path, name, rows, extra_lines=()):
+    path = tmp_path / name
+    lines = [json.dumps(r) for r in rows] + list(extra_lines)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def skus(catalog_dir, text, **kwargs):
+    index = CatalogIndex(catalog_dir)
+    try:
+        return [r["sku"] for r in index.search(text, **kwargs)]
+    finally:
+        index.close()
+
+
+KURTA = {"sku": "K1", "title": "Festive top", "category": "Kurta",
+         "description": "Breathable linen", "price": 1200, "color": "white"}
+SAREE = {"sku": "S1", "title": "Silk saree", "price": 8000, "color": "red"}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return str(tmp_path / "catalog")
+
+
+def test_search_filters_by_budget(tmp_path, catalog):
+    ingest(write_feed(tmp_path, "feed.jsonl", [KURTA, SAREE, dict(SAREE, sku="S2", price=2500)]), catalog)
+
+    assert skus(catalog, "silk saree", budget_max=3000) == ["S2"]
+    assert sorted(skus(catalog, "silk saree", budget_max=None)) == ["S1", "S2"]
+    assert skus(catalog, "silk saree", budget_max=0) == []
+
+
+def test_compact_keeps_category_and_description_terms(tmp_path, catalog):
+    ingest(write_feed(tmp_path, "feed.jsonl", [KURTA, SAREE]), catalog)
+    assert skus(catalog, "linen kurta") == ["K1"]
+
+    assert compact(catalog) == 2
+    assert skus(catalog, "linen kurta") == ["K1"]
+
+
+def test_update_replaces_every_older_copy_of_a_sku(tmp_path, catalog):
+    # The same SKU twice in one feed: both rows must be tombstoned by a later feed
+    ingest(write_feed(tmp_path, "a.jsonl", [SAREE, dict(SAREE, price=7000)]), catalog)
+    ingest(write_feed(tmp_path, "b.jsonl", [dict(SAREE, price=6000)]), catalog)
+
+    index = CatalogIndex(catalog)
+    try:
+        assert [r["price"] for r in index.search("silk saree")] == [6000]
+    finally:
+        index.close()
+    assert compact(catalog) == 1
+
+
+def test_deleted_rows_disappear(tmp_path, catalog):
+    ingest(write_feed(tmp_path, "a.jsonl", [KURTA, SAREE]), catalog)
+    ingest(write_feed(tmp_path, "b.jsonl", [dict(SAREE, deleted=True)]), catalog)
+    assert skus(catalog, "silk saree") == []
+
+
+def test_malformed_lines_are_skipped_and_do_not_block_later_ingests(tmp_path, catalog):
+    feed = write_feed(tmp_path, "a.jsonl", [KURTA], extra_lines=["{not json", "[1, 2]"])
+    assert ingest(feed, catalog) == 1
+    assert ingest(write_feed(tmp_path, "b.jsonl", [SAREE]), catalog) == 1
+
+    assert skus(catalog, "linen kurta") == ["K1"]
+    assert skus(catalog, "silk saree") == ["S1"]
+    assert not [name for name in os.listdir(catalog) if name.endswith(".tmp")]
@@ -0,0 +1,54 @@
+import pytest
+
+from services import chat_service
+from services.conversation_service import ChatMemory, style_audience, style_profile
+from services.response_cache import CHAT_CACHE
+
+USER_A = {
+    "gender": "Female", "occasion": "Wedding", "style": "Traditional",
+    "age": 52, "body_type": "Plus", "budget_min": 0, "budget_max": 3000,
+    "country": "India", "state": "Kerala",
+}
+USER_B = dict(USER_A, age=19, body_type="Slim", budget_max=90000,
+              country="United States", state="Texas")
+PRIVATE_FIELDS = ("age", "body_type", "budget_min", "budget_max", "country", "state")
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    sent = []
+
+    def fake_call(prompt, retries=3, backoff=True):
+        sent.append(prompt)
+        return f"answer {len(sent)}"
+
+    CHAT_CACHE.clear()
+    monkeypatch.setattr(chat_service, "_call_gemini", fake_call)
+    yield sent
+    CHAT_CACHE.clear()
+
+
+def ask(user, message):
+    return chat_service.chat_response(
+        message, memory=ChatMemory(),
+        profile=style_profile(user), audience=style_audience(user),
+    )
+
+
+def test_shared_answer_is_written_for_the_audience_only(prompts):
+    reply_a = ask(USER_A, "What shoes go with a saree?")
+    assert len(prompts) == 1
+    for field in PRIVATE_FIELDS:
+        assert f"{field.replace('_', ' ')}:" not in prompts[0]
+    assert "Kerala" not in prompts[0] and "52" not in prompts[0]
+    assert style_audience(USER_A) in prompts[0]
+
+    # Same audience, different person: served from the cache, no new call
+    assert ask(USER_B, "What shoes go with a saree?") == reply_a
+    assert len(prompts) == 1
+
+
+def test_personal_question_gets_the_full_profile_and_is_not_cached(prompts):
+    ask(USER_A, "What shoes go with my saree?")
+    assert "Kerala" in prompts[0]
+    assert len(CHAT_CACHE) == 0
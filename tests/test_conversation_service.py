@@ -0,0 +1,31 @@
+from services.conversation_service import SUMMARIZE_AFTER_TURNS, ChatMemory
+
+
+def chat(memory, summarize, messages):
+    for i in range(messages // 2):
+        memory.compact(summarize)
+        memory.add("user", f"Question {i}: what should I wear to a friend's sangeet in December?")
+        memory.add("assistant", f"Answer {i}: a jewel-toned lehenga with light layers for the evening chill.")
+
+
+def test_one_summary_covers_several_evicted_turns():
+    calls = []
+
+    def summarize(previous, transcript, max_words):
+        calls.append(transcript.count("\n") + 1)
+        return f"summary {len(calls)}"
+
+    memory = ChatMemory()
+    chat(memory, summarize, 60)
+
+    assert 0 < len(calls) <= 60 // SUMMARIZE_AFTER_TURNS
+    assert min(calls) > 1
+
+
+def test_pending_turns_stay_in_context_until_summarized():
+    memory = ChatMemory(budget=240)
+    chat(memory, lambda *args: "summary", 8)
+    assert memory.pending and not memory.summary
+    context = memory.context()
+    assert "Earlier in this conversation:" in context
+    assert memory.pending[-1]["text"] in context
@@ -0,0 +1,37 @@
+import time
+
+from services.prefetch_service import PREFETCH_EVENTS, StylePrefetcher
+
+INPUTS = {"gender": "Female", "occasion": "Wedding", "style": "Traditional"}
+
+
+def hits():
+    return PREFETCH_EVENTS.value(outcome="hit")
+
+
+def wait_started(prefetcher, timeout=2.0):
+    deadline = time.time() + timeout
+    while prefetcher._future is None and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_a_speculation_counts_as_one_hit_across_reruns():
+    prefetcher = StylePrefetcher(fetch=lambda inputs: {"outfit": "lehenga"}, debounce=0)
+    prefetcher.observe(INPUTS)
+    wait_started(prefetcher)
+    before = hits()
+
+    for _ in range(5):   # Step 3 reruns
+        assert prefetcher.take(INPUTS) == {"outfit": "lehenga"}
+    assert hits() == before + 1
+
+
+def test_foreground_results_are_not_hits():
+    prefetcher = StylePrefetcher(fetch=lambda inputs: {"outfit": "lehenga"}, debounce=60)
+    before = hits()
+    assert prefetcher.take(INPUTS) is None
+    prefetcher.put(INPUTS, {"outfit": "saree"})
+
+    for _ in range(3):
+        assert prefetcher.take(INPUTS) == {"outfit": "saree"}
+    assert hits() == before
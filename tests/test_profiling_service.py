@@ -0,0 +1,49 @@
+import cProfile
+import json
+import os
+
+import pytest
+
+from services import profiling_service
+from services.profiling_service import TIMINGS_FILE, profile_rerun, profiled
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("STYLEAI_PROFILE", "all")
+    monkeypatch.setenv("STYLEAI_PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def hook_taken(monkeypatch):
+    # What 3.12+ does when another thread's profiler holds sys.monitoring
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+    monkeypatch.setattr(cProfile.Profile, "enable", enable)
+
+
+@profiled("test.work")
+def work():
+    return 42
+
+
+def test_busy_hook_falls_back_to_timing_a_call(profile_dir, hook_taken):
+    assert work() == 42
+    assert not profiling_service._local.active
+    entries = [json.loads(line) for line in (profile_dir / TIMINGS_FILE).read_text().splitlines()]
+    assert [e["call"] for e in entries] == ["test.work"]
+    assert "profile" not in entries[0]
+
+
+def test_busy_hook_falls_back_to_timing_a_rerun(profile_dir, hook_taken):
+    with profile_rerun("step1"):
+        assert work() == 42
+    assert not profiling_service._local.active
+    assert not [name for name in os.listdir(profile_dir) if name.endswith(".prof")]
+
+
+def test_rerun_is_profiled_when_the_hook_is_free(profile_dir):
+    with profile_rerun("step1"):
+        work()
+    assert [name for name in os.listdir(profile_dir) if name.startswith("rerun-step1")]
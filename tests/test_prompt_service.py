@@ -0,0 +1,33 @@
+import pytest
+
+from services.prompt_service import canonicalize, dedupe_prompts
+
+
+@pytest.mark.parametrize("first, second", [
+    ("A flowy pastel pink anarkali with gold embroidery, soft studio lighting",
+     "Flowy pastel pink anarkali with gold embroidery; soft studio lighting"),
+    ("Statement gold jewellery with a maroon silk saree",
+     "statement gold jewelry with a maroon silk saree"),
+    ("Tailored navy suit, crisp white shirt, brown leather oxfords and a silk pocket square",
+     "Tailored navy suit, crisp white shirt, brown leather oxfords, silk pocket square, studio photo"),
+])
+def test_near_duplicates_share_one_generation(first, second):
+    unique, slots = dedupe_prompts([first, second])
+    assert len(unique) == 1
+    assert slots == [0, 0]
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Black blazer over a white shirt", "White blazer over a black shirt"),
+    ("Flowy pastel pink anarkali with gold embroidery, soft studio lighting",
+     "Flowy pastel blue anarkali with gold embroidery, soft studio lighting"),
+    ("Saree with a belt", "Saree without a belt"),
+])
+def test_swapped_or_replaced_words_stay_apart(first, second):
+    unique, slots = dedupe_prompts([first, second])
+    assert len(unique) == 2
+    assert slots == [0, 1]
+
+
+def test_canonicalize_folds_case_spacing_repeats_and_spelling():
+    assert canonicalize("Grey  Kurta; grey kurta |  Silver Jewellery") == "gray kurta, silver jewelry"
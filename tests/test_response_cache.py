@@ -0,0 +1,39 @@
+import pytest
+
+from services.response_cache import SemanticCache, content_words, normalize
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What shoes go with a saree?", "What shoes go with a lehenga?"),
+    ("What shoes go with a saree?", "What shoes go with a kurta?"),
+    ("What shoes go with navy trousers?", "What shoes go with black trousers?"),
+    ("white shirt for office", "black shirt for office"),
+    ("What footwear goes best with a silk saree worn with a belt?",
+     "What footwear goes best with a silk saree worn without a belt?"),
+    ("Which jacket looks good over a cotton kurta for a winter wedding?",
+     "Which jacket looks good under a cotton kurta for a winter wedding?"),
+])
+def test_different_garment_or_colour_is_a_miss(cached, asked):
+    cache = SemanticCache()
+    cache.put(cached, "cached answer")
+    assert cache.get(asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What shoes go with a saree?", "what shoes go with a SAREE"),
+    ("What shoes go with navy trousers?", "What shoes go well with navy trousers"),
+])
+def test_rephrasing_is_a_hit(cached, asked):
+    cache = SemanticCache()
+    cache.put(cached, "cached answer")
+    assert cache.get(asked) == "cached answer"
+
+
+def test_namespaces_are_separate():
+    cache = SemanticCache()
+    cache.put("What shoes go with a saree?", "for women", namespace="gender: Female")
+    assert cache.get("What shoes go with a saree?", namespace="gender: Male") is None
+
+
+def test_content_words_fold_plurals_and_drop_function_words():
+    assert content_words(normalize("What shoes go with the jeans?")) == {"shoe", "with", "jean"}
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+from services.session_store import SessionStore, _HOST
+
+
+def make_owner_dir(root, name):
+    os.makedirs(os.path.join(root, name))
+    open(os.path.join(root, name, "blob"), "wb").close()
+
+
+def test_only_dead_owners_on_this_host_are_swept(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    root = str(tmp_path)
+    make_owner_dir(root, f"{_HOST}-{dead.pid}-deadbeef")
+    make_owner_dir(root, f"{_HOST}-{os.getpid()}-cafebabe")     # live replica
+    make_owner_dir(root, f"otherhost-{dead.pid}-deadbeef")      # pid means nothing here
+    make_owner_dir(root, "unrelated")
+
+    SessionStore(spill_dir=root)
+
+    assert sorted(os.listdir(root)) == sorted([
+        f"{_HOST}-{os.getpid()}-cafebabe", f"otherhost-{dead.pid}-deadbeef", "unrelated",
+    ])
+
+
+def test_spilled_blobs_come_back_and_live_in_the_process_dir(tmp_path):
+    store = SessionStore(session_max=10, process_max=100, spill_dir=str(tmp_path))
+    store.put("s", "a", b"a" * 8)
+    store.put("s", "b", b"b" * 8)
+
+    assert store.usage("s") == {"memory_bytes": 8, "disk_bytes": 8, "items": 2}
+    assert len(os.listdir(store.spill_dir)) == 1
+    assert store.get("s", "a") == b"a" * 8
+
+    store.drop_session("s")
+    assert os.listdir(store.spill_dir) == []
+    store._remove_spill_dir()
+    assert os.listdir(str(tmp_path)) == []
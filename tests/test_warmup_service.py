@@ -0,0 +1,30 @@
+import time
+
+from services.warmup_service import WARM, ModelWarmer
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_startup_only_mode_pings_once_across_reruns():
+    pings = []
+    warmer = ModelWarmer(["m"], lambda model: pings.append(model) or 200, interval=0)
+    for _ in range(5):   # every Streamlit rerun calls start()
+        warmer.start()
+        assert wait_for(lambda: not warmer._thread.is_alive())
+    assert len(pings) == 1
+
+
+def test_a_cold_request_restarts_the_finished_scheduler():
+    pings = []
+    warmer = ModelWarmer(["m"], lambda model: pings.append(model) or 200, interval=0)
+    warmer.start()
+    assert wait_for(lambda: not warmer._thread.is_alive())
+
+    warmer.note_status("m", 503)
+    assert wait_for(lambda: len(pings) == 2)
+    assert wait_for(lambda: warmer.state("m") == WARM)